@@ -1,5 +1,6 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+import json
 import os
 import sys
 
@@ -9,6 +10,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from models.calorie_calculator import CalorieCalculator
 from models.workout_suggester import WorkoutSuggester
 from models.data_collector import DataCollector
+from models.program_generator import ProgramGenerator
+from utils.rate_limiter import AdmissionController, SharedBucketStore, client_identity
+from utils.result_cache import SharedResultCache
+from utils.static_assets import StaticAssets
+from utils.validation import (ALTERNATIVES_SCHEMA, CALORIE_SCHEMA, PROGRAM_SCHEMA, PROJECTION_SCHEMA,
+                              WORKOUT_SCHEMA, ValidationError)
 
 app = Flask(__name__)
 CORS(app)
@@ -16,16 +23,71 @@ CORS(app)
 # Initialize ML models and data collector
 calorie_calculator = CalorieCalculator()
 workout_suggester = WorkoutSuggester()
+program_generator = ProgramGenerator(workout_suggester)
 data_collector = DataCollector()
 
+# Shared across pre-forked workers when created before the fork (gunicorn --preload)
+admission_controller = AdmissionController(SharedBucketStore())
+result_cache = SharedResultCache()
+static_assets = StaticAssets()
+
+def _env_set(name):
+    return frozenset(value.strip() for value in os.environ.get(name, '').split(',') if value.strip())
+
+# Comma-separated. Only these X-API-Key values get their own rate-limit bucket; other clients are keyed by address
+API_KEYS = _env_set('FITMENTOR_API_KEYS')
+# Comma-separated proxy addresses (e.g. 127.0.0.1 for a local nginx) whose X-Forwarded-For is trusted
+TRUSTED_PROXIES = _env_set('FITMENTOR_TRUSTED_PROXIES')
+
+@app.before_request
+def admit_request():
+    """Rate limit per configured API key or client address and shed load before any model work"""
+    if request.method == 'OPTIONS' or not request.path.startswith('/api'):
+        return None
+
+    g.client_key = client_identity(request.headers.get('X-API-Key'), request.remote_addr,
+                                   request.headers.get('X-Forwarded-For'), API_KEYS, TRUSTED_PROXIES)
+    rejection = admission_controller.admit(g.client_key, request.path)
+    if rejection is not None:
+        status, retry_after, message = rejection
+        response = jsonify({'error': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    g.admitted = True
+    return None
+
+@app.teardown_request
+def release_request(exc):
+    if g.pop('admitted', False):
+        admission_controller.release()
+
 @app.route('/')
+def index():
+    """Frontend HTML shell"""
+    return static_assets.index_response(request)
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    """Fingerprinted, precompressed frontend assets"""
+    return static_assets.asset_response(filename, request)
+
+@app.route('/<any(css, js, images):folder>/<path:filename>')
+def frontend_source(folder, filename):
+    """Unbuilt frontend files, for development without running build_assets.py"""
+    return static_assets.source_response(f'{folder}/{filename}')
+
+@app.route('/api')
 def home():
     return jsonify({
         'message': 'FitMentor AI API',
         'version': '1.0.0',
         'endpoints': {
             'calorie_calculator': '/api/calculate-calories',
-            'workout_suggester': '/api/suggest-workout'
+            'weight_projection': '/api/project-weight',
+            'workout_suggester': '/api/suggest-workout',
+            'program_generator': '/api/generate-program'
         }
     })
 
@@ -33,27 +95,43 @@ def home():
 def calculate_calories():
     """Calculate maintenance calories and macronutrient breakdown"""
     try:
-        data = request.get_json()
-
-        required_fields = ['age', 'height', 'weight', 'gender', 'activity_level', 'goal']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-
-        result = calorie_calculator.calculate(
-            age=data['age'],
-            height=data['height'],
-            weight=data['weight'],
-            gender=data['gender'],
-            activity_level=data['activity_level'],
-            goal=data['goal']
-        )
+        params, cache_key = CALORIE_SCHEMA.validate(request.get_json(silent=True))
+
+        payload = result_cache.get(cache_key)
+        if payload is None:
+            result = calorie_calculator.calculate(**params)
+            payload = _serialize(result)
+            result_cache.put(cache_key, payload)
+        else:
+            result = json.loads(payload)
 
         # Save data for future model improvement (temporarily disabled)
-        # data_collector.save_calorie_calculation(data, result)
+        # data_collector.save_calorie_calculation(params, result, request.headers.get('Idempotency-Key'),
+        #                                         g.client_key)
+
+        return app.response_class(payload, mimetype='application/json')
+
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return jsonify(result)
+def _serialize(result):
+    """Serialize a response body exactly as jsonify would"""
+    return (app.json.dumps(result) + '\n').encode('utf-8')
 
+@app.route('/api/project-weight', methods=['POST'])
+def project_weight():
+    """Project week-by-week weight, BMR/TDEE and calorie targets for one or more profiles"""
+    try:
+        params, _ = PROJECTION_SCHEMA.validate(request.get_json(silent=True))
+
+        projections = calorie_calculator.project(**params)
+
+        return jsonify({'weeks': params['weeks'], 'projections': projections})
+
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -61,29 +139,51 @@ def calculate_calories():
 def suggest_workout():
     """Generate personalized workout plan"""
     try:
-        data = request.get_json()
+        params, cache_key = WORKOUT_SCHEMA.validate(request.get_json(silent=True))
+
+        payload = result_cache.get(cache_key)
+        if payload is None:
+            result = workout_suggester.generate_plan(**params)
+            payload = _serialize(result)
+            result_cache.put(cache_key, payload)
+        else:
+            result = json.loads(payload)
 
-        required_fields = ['gender', 'goal', 'experience', 'equipment', 'days_per_week']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        data_collector.save_workout_plan(params, result, request.headers.get('Idempotency-Key'), g.client_key)
 
-        result = workout_suggester.generate_plan(
-            goal=data['goal'],
-            experience=data['experience'],
-            equipment=data['equipment'],
-            days_per_week=data['days_per_week'],
-            session_duration=data.get('session_duration', 60),
-            gender=data['gender']
-        )
+        return app.response_class(payload, mimetype='application/json')
 
-        data_collector.save_workout_plan(data, result)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return jsonify(result)
+@app.route('/api/generate-program', methods=['POST'])
+def generate_program():
+    """Stream a multi-week periodized program as NDJSON, one week per line"""
+    try:
+        params, _ = PROGRAM_SCHEMA.validate(request.get_json(silent=True))
+        start_week = params.pop('start_week')
+        end_week = params.pop('end_week')
+        if start_week > params['weeks']:
+            raise ValidationError(f"start_week must be at most weeks ({params['weeks']})")
+        if end_week is not None and end_week < start_week:
+            raise ValidationError('end_week must not be before start_week')
 
+        program = program_generator.build_program(**params)
+
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    def generate():
+        yield json.dumps(program_generator.program_header(program)) + '\n'
+        for week in program_generator.iter_weeks(program, start_week, end_week):
+            yield json.dumps(week) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/exercises', methods=['GET'])
 def get_exercises():
     """Get list of all available exercises with details"""
@@ -93,18 +193,65 @@ def get_exercises():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/exercises/<int:exercise_id>/alternatives', methods=['GET'])
+def get_exercise_alternatives(exercise_id):
+    """Find similar substitute exercises, e.g. ?equipment=dumbbell,bench&experience=beginner&k=5"""
+    try:
+        params, _ = ALTERNATIVES_SCHEMA.validate(request.args.to_dict())
+
+        alternatives = workout_suggester.find_alternatives(exercise_id, **params)
+
+        return jsonify({'exercise_id': exercise_id, 'alternatives': alternatives})
+
+    except KeyError:
+        return jsonify({'error': f'Exercise not found: {exercise_id}'}), 404
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get statistics about collected data for model improvement"""
     try:
+        counts = data_collector.get_record_counts()
         return jsonify({
-            'calorie_calculations': data_collector.get_calorie_data_count(),
-            'workout_plans': data_collector.get_workout_data_count(),
+            'calorie_calculations': counts['calorie'],
+            'workout_plans': counts['workout'],
             'message': 'Data collected for continuous model improvement'
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats/workouts', methods=['GET'])
+def get_workout_stats():
+    """Distribution of goals, experience, splits and equipment sets across saved workout plans"""
+    return _stats_response('workout')
+
+@app.route('/api/stats/calories', methods=['GET'])
+def get_calorie_stats():
+    """Category counts and calorie/BMR/TDEE percentiles (overall and by activity level)"""
+    return _stats_response('calorie')
+
+def _stats_response(kind):
+    try:
+        quantiles = request.args.get('q')
+        if quantiles:
+            quantiles = [float(q) for q in quantiles.split(',')]
+            if not all(0 <= q <= 1 for q in quantiles):
+                raise ValueError
+            return jsonify(data_collector.get_stats(kind, quantiles))
+        return jsonify(data_collector.get_stats(kind))
+    except ValueError:
+        return jsonify({'error': 'q must be comma-separated quantiles between 0 and 1'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit ratio, eviction and contention counters for this worker's view of the result cache"""
+    return jsonify(result_cache.stats())
+
 if __name__ == '__main__':
     print("Starting FitMentor API server...")
     print("Initializing ML models...")
@@ -0,0 +1,295 @@
+"""
+Incremental analytics over collected data
+Rolling counters and mergeable quantile sketches updated as records are written
+
+Each worker keeps its own aggregates and periodically persists them to
+aggregates/worker-<pid>-<run id>.json. Reads merge the live aggregates with the
+other workers' snapshots, so stats cost the same no matter how much history
+exists. Snapshots left by exited workers are folded into a live worker on
+startup. The run id is unique per process start, so a restart that gets the
+same pid (PID 1 in a container) adopts its predecessor's snapshot instead of
+overwriting it.
+"""
+
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from utils.processes import pid_alive
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch-style) with bounded relative error"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """Approximate q-quantile, within relative_accuracy of the true value"""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {'buckets': {str(i): c for i, c in self.buckets.items()}, 'zero_count': self.zero_count,
+                'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data, relative_accuracy=0.01):
+        sketch = cls(relative_accuracy)
+        sketch.buckets = {int(i): c for i, c in data['buckets'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        return sketch
+
+
+class RollingAggregates:
+    """Counters per categorical field and quantile sketches per numeric output"""
+
+    def __init__(self):
+        self.categorical_fields = {
+            'workout': ['goal', 'experience', 'gender', 'days_per_week', 'equipment'],
+            'calorie': ['goal', 'activity_level', 'gender']
+        }
+        self.quantile_metrics = {
+            'workout': [],
+            'calorie': ['target_calories', 'bmr', 'tdee']
+        }
+        self.group_by = {'calorie': 'activity_level'}
+
+        self.totals = {kind: 0 for kind in self.categorical_fields}
+        self.counters = {kind: {field: {} for field in fields} for kind, fields in self.categorical_fields.items()}
+        self.sketches = {kind: {} for kind in self.categorical_fields}
+
+    def record(self, kind, input_data, result):
+        """Update counters and sketches with one saved record"""
+        self.totals[kind] += 1
+
+        counters = self.counters[kind]
+        for field in self.categorical_fields[kind]:
+            value = input_data.get(field)
+            if value is None:
+                continue
+            value = ','.join(sorted(value)) if isinstance(value, list) else str(value)
+            counters[field][value] = counters[field].get(value, 0) + 1
+
+        group_field = self.group_by.get(kind)
+        for metric in self.quantile_metrics[kind]:
+            value = result.get(metric)
+            if value is None:
+                continue
+            self._sketch(kind, metric).add(value)
+            if group_field and input_data.get(group_field) is not None:
+                self._sketch(kind, f'{metric}|{input_data[group_field]}').add(value)
+
+    def _sketch(self, kind, name):
+        sketch = self.sketches[kind].get(name)
+        if sketch is None:
+            sketch = self.sketches[kind][name] = QuantileSketch()
+        return sketch
+
+    def merge(self, other):
+        for kind, total in other.totals.items():
+            self.totals[kind] = self.totals.get(kind, 0) + total
+        for kind, fields in other.counters.items():
+            for field, counts in fields.items():
+                target = self.counters.setdefault(kind, {}).setdefault(field, {})
+                for value, count in counts.items():
+                    target[value] = target.get(value, 0) + count
+        for kind, sketches in other.sketches.items():
+            for name, sketch in sketches.items():
+                self._sketch(kind, name).merge(sketch)
+
+    def summary(self, kind, quantiles):
+        """Totals, counters and requested quantiles (overall and per group) for one record kind"""
+        metrics = {}
+        for name, sketch in self.sketches[kind].items():
+            metric, _, group = name.partition('|')
+            values = {f'p{q * 100:g}': _round(sketch.quantile(q)) for q in quantiles}
+            if group:
+                metrics.setdefault(metric, {}).setdefault(f'by_{self.group_by[kind]}', {})[group] = values
+            else:
+                metrics.setdefault(metric, {}).update(values)
+
+        return {
+            'total': self.totals[kind],
+            'counts': self.counters[kind],
+            'quantiles': metrics
+        }
+
+    def to_dict(self):
+        return {
+            'totals': self.totals,
+            'counters': self.counters,
+            'sketches': {kind: {name: s.to_dict() for name, s in sketches.items()}
+                         for kind, sketches in self.sketches.items()}
+        }
+
+    def merge_dict(self, data):
+        """Merge a persisted snapshot into these aggregates"""
+        other = RollingAggregates()
+        other.totals = data['totals']
+        other.counters = data['counters']
+        other.sketches = {kind: {name: QuantileSketch.from_dict(s) for name, s in sketches.items()}
+                          for kind, sketches in data['sketches'].items()}
+        self.merge(other)
+
+
+def _round(value):
+    return None if value is None else round(value)
+
+
+class AnalyticsStore:
+    """Per-worker rolling aggregates with periodic persistence and cross-worker merge"""
+
+    def __init__(self, data_dir, flush_every=50, flush_interval_seconds=30):
+        self.aggregates_dir = os.path.join(data_dir, 'aggregates')
+        self.flush_every = flush_every
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self.pid = os.getpid()
+        self.run_id = uuid.uuid4().hex[:12]
+        self.aggregates = RollingAggregates()
+        self._dirty = 0
+        self._flushed_at = time.monotonic()
+        self._others = None
+        self._others_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(self.aggregates_dir)
+            self._backfill(data_dir)
+        except FileExistsError:
+            self._adopt_exited_workers()
+
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.flush)
+
+    def _after_fork(self):
+        """A forked worker starts empty; the parent's totals stay in the parent's snapshot"""
+        self.pid = os.getpid()
+        self.run_id = uuid.uuid4().hex[:12]
+        self.aggregates = RollingAggregates()
+        self._dirty = 0
+        self._others = None
+        self._lock = threading.Lock()
+
+    def _snapshot_path(self):
+        return os.path.join(self.aggregates_dir, f'worker-{self.pid}-{self.run_id}.json')
+
+    def _exited(self, path):
+        """Whether a snapshot was written by a process that is no longer running"""
+        pid, _, run_id = os.path.basename(path)[len('worker-'):-len('.json')].partition('-')
+        if int(pid) == self.pid:
+            return run_id != self.run_id  # An earlier process that had our pid
+        return not pid_alive(int(pid))
+
+    def _backfill(self, data_dir):
+        """First start: build aggregates once from the existing JSONL history"""
+        for kind, filename in [('calorie', 'calorie_calculations.jsonl'), ('workout', 'workout_plans.jsonl')]:
+            path = os.path.join(data_dir, filename)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.aggregates.record(kind, record['input'], record['output'])
+                    self._dirty += 1
+        self.flush()
+
+    def _adopt_exited_workers(self):
+        """Fold snapshots of workers that are no longer running into this worker"""
+        for path in glob.glob(os.path.join(self.aggregates_dir, 'worker-*.json')):
+            if not self._exited(path):
+                continue
+
+            claimed = f'{path}.adopted-{self.pid}'
+            try:
+                os.rename(path, claimed)  # Atomic claim so only one worker adopts it
+            except OSError:
+                continue
+            with open(claimed, 'r') as f:
+                self.aggregates.merge_dict(json.load(f))
+            self._dirty += 1
+            self.flush()
+            os.remove(claimed)
+
+    def record(self, kind, input_data, result):
+        """Record one saved record, flushing when enough records or time have passed"""
+        with self._lock:
+            self.aggregates.record(kind, input_data, result)
+            self._dirty += 1
+            due = (self._dirty >= self.flush_every or
+                   time.monotonic() - self._flushed_at >= self.flush_interval_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Persist this worker's aggregates atomically"""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self.aggregates.to_dict())
+            self._dirty = 0
+            self._flushed_at = time.monotonic()
+
+        path = self._snapshot_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def merged(self):
+        """Aggregates across all workers: live for this worker, last snapshot for the others"""
+        now = time.monotonic()
+        if self._others is None or now - self._others_loaded_at >= self.flush_interval_seconds:
+            others = RollingAggregates()
+            for path in glob.glob(os.path.join(self.aggregates_dir, 'worker-*.json')):
+                if path == self._snapshot_path():
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        others.merge_dict(json.load(f))
+                except (OSError, ValueError):
+                    continue
+            self._others = others
+            self._others_loaded_at = now
+
+        merged = RollingAggregates()
+        merged.merge(self._others)
+        with self._lock:
+            merged.merge(self.aggregates)
+        return merged
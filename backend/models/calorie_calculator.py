@@ -39,6 +39,12 @@ class CalorieCalculator:
 
         self.fat_minimum_ratio = 0.25  # At least 25% of calories from fat
 
+        self.kcal_per_kg = 7700  # Energy content of 1 kg body weight change
+
+        # Projection limits: no deficit below a healthy BMI, no intake below a safe minimum
+        self.min_bmi = 18.5
+        self.min_intake = {'male': 1500, 'female': 1200}
+
         # TODO: Lazy-load ML model when trained weights available
         self.model = None
 
@@ -79,7 +85,7 @@ class CalorieCalculator:
         target_calories = tdee + goal_adjustment
 
         weight_lbs = weight * 2.20462
-        macros = self._calculate_macros(target_calories, goal, weight_lbs)
+        macros = self._calculate_macros(target_calories, self.protein_targets[goal], weight_lbs)
         recommendations = self._generate_recommendations(goal, activity_level, target_calories)
 
         return {
@@ -91,35 +97,124 @@ class CalorieCalculator:
         }
 
     def _calculate_bmr(self, age, height, weight, gender):
-        """Calculate BMR using Mifflin-St Jeor equation"""
+        """Calculate BMR using Mifflin-St Jeor equation (gender may be a boolean is-male array)"""
+        if isinstance(gender, np.ndarray):
+            return 10 * weight + 6.25 * height - 5 * age + np.where(gender, 5, -161)
         if gender == 'male':
             return 10 * weight + 6.25 * height - 5 * age + 5
         else:
             return 10 * weight + 6.25 * height - 5 * age - 161
 
-    def _calculate_macros(self, target_calories, goal, weight_lbs):
-        """Calculate macronutrient breakdown based on bodyweight and goal"""
-        # Protein: 1.0g per lb bodyweight
-        protein_per_lb = self.protein_targets[goal]
-        protein_grams = int(weight_lbs * protein_per_lb)
+    def _calculate_macros(self, target_calories, protein_per_lb, weight_lbs):
+        """Calculate macronutrient breakdown based on bodyweight and the goal's protein target
+        (any argument may be an array)"""
+        # Protein: the goal's g per lb bodyweight
+        protein_grams = np.trunc(weight_lbs * protein_per_lb)
         protein_calories = protein_grams * 4
 
         # Fat: minimum 25% of calories for hormonal health
-        fat_calories = int(target_calories * self.fat_minimum_ratio)
-        fat_grams = int(fat_calories / 9)
+        fat_calories = np.trunc(target_calories * self.fat_minimum_ratio)
+        fat_grams = np.trunc(fat_calories / 9)
 
         # Carbs: remaining calories
         carbs_calories = target_calories - protein_calories - fat_calories
-        carbs_grams = int(carbs_calories / 4)
+        carbs_grams = np.trunc(carbs_calories / 4)
+
+        protein_percentage = np.trunc((protein_calories / target_calories) * 100)
+        carbs_percentage = np.trunc((carbs_calories / target_calories) * 100)
+        fats_percentage = np.trunc((fat_calories / target_calories) * 100)
+
+        return {
+            'protein': {'grams': _to_int(protein_grams), 'calories': _to_int(protein_calories),
+                        'percentage': _to_int(protein_percentage)},
+            'carbs': {'grams': _to_int(carbs_grams), 'calories': _to_int(carbs_calories),
+                      'percentage': _to_int(carbs_percentage)},
+            'fats': {'grams': _to_int(fat_grams), 'calories': _to_int(fat_calories),
+                     'percentage': _to_int(fats_percentage)}
+        }
 
-        protein_percentage = int((protein_calories / target_calories) * 100)
-        carbs_percentage = int((carbs_calories / target_calories) * 100)
-        fats_percentage = int((fat_calories / target_calories) * 100)
+    def project(self, profiles, weeks=12, adjust_every_weeks=2):
+        """Project weekly weight, BMR/TDEE, calorie targets and macros for a list of profiles"""
+        projection = self.project_batch(
+            ages=[p['age'] for p in profiles],
+            heights=[p['height'] for p in profiles],
+            weights=[p['weight'] for p in profiles],
+            genders=[p['gender'] for p in profiles],
+            activity_levels=[p['activity_level'] for p in profiles],
+            goals=[p['goal'] for p in profiles],
+            weeks=weeks,
+            adjust_every_weeks=adjust_every_weeks
+        )
+
+        weight = np.round(projection['weight'], 1).tolist()
+        bmr = projection['bmr'].tolist()
+        tdee = projection['tdee'].tolist()
+        target = projection['target_calories'].tolist()
+        macros = {name: macro['grams'].tolist() for name, macro in projection['macros'].items()}
+
+        return [{
+            'weight': weight[i],
+            'bmr': bmr[i],
+            'tdee': tdee[i],
+            'target_calories': target[i],
+            'macros': {name: grams[i] for name, grams in macros.items()}
+        } for i in range(len(profiles))]
+
+    def project_batch(self, ages, heights, weights, genders, activity_levels, goals, weeks=12,
+                      adjust_every_weeks=2):
+        """
+        Simulate users x weeks with NumPy arrays
+
+        Each week BMR and TDEE are re-derived from the current weight. Intake is
+        held between check-ins and re-targeted every `adjust_every_weeks` weeks,
+        automating the "adjust calories if progress stalls" recommendation.
+        Weight never drops below a BMI of `min_bmi` (or the starting weight, if
+        lower): users who reach it are re-targeted to maintenance. Targets never
+        go below `min_intake`, or below TDEE when TDEE itself is lower.
+        Returns arrays of shape (users, weeks) plus weight of shape (users, weeks + 1).
+        """
+        age = np.asarray(ages, dtype=np.float64)
+        height = np.asarray(heights, dtype=np.float64)
+        weight = np.asarray(weights, dtype=np.float64)
+        is_male = np.asarray(genders) == 'male'
+        multiplier = np.array([self.activity_multipliers.get(a, 1.2) for a in activity_levels])
+        adjustment = np.array([self.goal_adjustments.get(g, 0) for g in goals], dtype=np.float64)
+        protein_per_lb = np.array([self.protein_targets.get(g, 1.0) for g in goals])
+        min_intake = np.where(is_male, self.min_intake['male'], self.min_intake['female'])
+        floor_weight = np.minimum(weight, self.min_bmi * (height / 100) ** 2)
+
+        users = len(weight)
+        weight_track = np.empty((users, weeks + 1))
+        bmr_track = np.empty((users, weeks))
+        tdee_track = np.empty((users, weeks))
+        target_track = np.empty((users, weeks))
+
+        weight_track[:, 0] = weight
+        target = None
+        for week in range(weeks):
+            bmr = self._calculate_bmr(age, height, weight, is_male)
+            tdee = np.trunc(bmr * multiplier)
+            if week % adjust_every_weeks == 0:
+                target = tdee + np.where(weight > floor_weight, adjustment, np.maximum(adjustment, 0))
+                target = np.maximum(target, np.minimum(min_intake, tdee))
+
+            weight = weight + (target - tdee) * 7 / self.kcal_per_kg
+            weight = np.where(target < tdee, np.maximum(weight, floor_weight), weight)
+
+            bmr_track[:, week] = bmr
+            tdee_track[:, week] = tdee
+            target_track[:, week] = target
+            weight_track[:, week + 1] = weight
+
+        weight_lbs = weight_track[:, :-1] * 2.20462
+        macros = self._calculate_macros(target_track, protein_per_lb[:, None], weight_lbs)
 
         return {
-            'protein': {'grams': protein_grams, 'calories': protein_calories, 'percentage': protein_percentage},
-            'carbs': {'grams': carbs_grams, 'calories': carbs_calories, 'percentage': carbs_percentage},
-            'fats': {'grams': fat_grams, 'calories': fat_calories, 'percentage': fats_percentage}
+            'weight': weight_track,
+            'bmr': np.trunc(bmr_track).astype(np.int32),
+            'tdee': tdee_track.astype(np.int32),
+            'target_calories': target_track.astype(np.int32),
+            'macros': macros
         }
 
     def _generate_recommendations(self, goal, activity_level, target_calories):
@@ -174,3 +269,8 @@ class CalorieCalculator:
         }.get(activity_level, 0.5)
 
         return np.array([[age, height, weight, gender_encoded, activity_encoded]])
+
+
+def _to_int(value):
+    """int for scalars, int32 array for arrays"""
+    return value.astype(np.int32) if isinstance(value, np.ndarray) else int(value)
@@ -1,22 +1,46 @@
+import hashlib
 import json
 import os
 from datetime import datetime
 
+from models.analytics import AnalyticsStore
+from models.dedup_filter import SlidingBloomFilter
+
 class DataCollector:
     """
     Collects user inputs and results for future model training
     Helps improve ML models over time with real data
+
+    Retried requests are dropped: a record is skipped if the same client
+    sent the same Idempotency-Key, or the same normalized input and output,
+    within the dedup window. Different clients never dedup each other.
     """
 
-    def __init__(self, data_dir='../data'):
+    def __init__(self, data_dir='../data', dedup_window_seconds=3600, dedup_capacity=100000):
         self.data_dir = os.path.join(os.path.dirname(__file__), data_dir)
         os.makedirs(self.data_dir, exist_ok=True)
 
         self.calorie_data_file = os.path.join(self.data_dir, 'calorie_calculations.jsonl')
         self.workout_data_file = os.path.join(self.data_dir, 'workout_plans.jsonl')
 
-    def save_calorie_calculation(self, input_data, result):
-        """Save calorie calculation for future training"""
+        self.dedup_filter = SlidingBloomFilter(capacity=dedup_capacity, window_seconds=dedup_window_seconds)
+        self.analytics = AnalyticsStore(self.data_dir)
+
+    def _is_duplicate(self, kind, input_data, result, idempotency_key, client_id):
+        """Check the sliding window for a repeat of this record from the same client"""
+        if idempotency_key:
+            key = json.dumps([kind, 'key', client_id, idempotency_key])
+        else:
+            content = json.dumps([kind, 'content', client_id, input_data, result], sort_keys=True,
+                                 separators=(',', ':'))
+            key = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+        return self.dedup_filter.check_and_add(key)
+
+    def save_calorie_calculation(self, input_data, result, idempotency_key=None, client_id=None):
+        """Save calorie calculation for future training; returns False if dropped as a duplicate"""
+        if self._is_duplicate('calorie', input_data, result, idempotency_key, client_id):
+            return False
+
         record = {
             'timestamp': datetime.now().isoformat(),
             'input': input_data,
@@ -25,9 +49,14 @@ class DataCollector:
 
         with open(self.calorie_data_file, 'a') as f:
             f.write(json.dumps(record) + '\n')
+        self.analytics.record('calorie', input_data, result)
+        return True
+
+    def save_workout_plan(self, input_data, result, idempotency_key=None, client_id=None):
+        """Save workout plan generation for future training; returns False if dropped as a duplicate"""
+        if self._is_duplicate('workout', input_data, result, idempotency_key, client_id):
+            return False
 
-    def save_workout_plan(self, input_data, result):
-        """Save workout plan generation for future training"""
         record = {
             'timestamp': datetime.now().isoformat(),
             'input': input_data,
@@ -36,6 +65,16 @@ class DataCollector:
 
         with open(self.workout_data_file, 'a') as f:
             f.write(json.dumps(record) + '\n')
+        self.analytics.record('workout', input_data, result)
+        return True
+
+    def get_stats(self, kind, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9, 0.99)):
+        """Rolling stats for 'calorie' or 'workout' records, merged across workers"""
+        return self.analytics.merged().summary(kind, quantiles)
+
+    def get_record_counts(self):
+        """Record totals from the rolling aggregates (no file scan)"""
+        return dict(self.analytics.merged().totals)
 
     def get_calorie_data_count(self):
         """Get number of calorie calculations collected"""
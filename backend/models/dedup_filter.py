@@ -0,0 +1,93 @@
+"""
+Sliding-window duplicate filter
+Two rotating Bloom filter generations give constant memory and microsecond checks
+
+A key is reported as seen if it was added to the current or previous
+generation. Generations rotate every half window (or when one fills up), so a
+repeat is always caught within window/2 and never remembered past the window.
+False positives (a new record dropped as a duplicate) stay near `error_rate`.
+
+Both generations live in an anonymous shared mmap. A filter created before the
+server forks its workers (e.g. gunicorn --preload) is shared by all of them, so
+a retry routed to a different worker is still caught.
+"""
+
+import hashlib
+import math
+import mmap
+import multiprocessing
+import struct
+import time
+
+
+class SlidingBloomFilter:
+    _header = struct.Struct('<BQd')  # current generation (0 or 1), keys added to it, last rotation
+
+    def __init__(self, capacity=100000, error_rate=0.001, window_seconds=3600):
+        self.capacity = capacity              # Keys per generation before an early rotation
+        self.error_rate = error_rate
+        self.window_seconds = window_seconds
+
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+        self._generation_bytes = (self.num_bits + 7) // 8
+        self._memory = mmap.mmap(-1, self._header.size + 2 * self._generation_bytes)
+        self._header.pack_into(self._memory, 0, 0, 0, time.monotonic())
+        self._lock = multiprocessing.Lock()
+
+    @property
+    def memory_bytes(self):
+        """Bytes held by both generations"""
+        return 2 * self._generation_bytes
+
+    def check_and_add(self, key):
+        """Return True if key was seen within the window; otherwise remember it and return False"""
+        positions = self._positions(key)
+
+        with self._lock:
+            current, count = self._maybe_rotate()
+            current_offset = self._generation_offset(current)
+            if (self._contains(current_offset, positions) or
+                    self._contains(self._generation_offset(1 - current), positions)):
+                return True
+
+            memory = self._memory
+            for position in positions:
+                memory[current_offset + (position >> 3)] |= 1 << (position & 7)
+            struct.pack_into('<Q', memory, 1, count + 1)  # Header count, after the generation byte
+            return False
+
+    def _positions(self, key):
+        """Bit positions via double hashing of one 128-bit digest"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _generation_offset(self, generation):
+        return self._header.size + generation * self._generation_bytes
+
+    def _contains(self, offset, positions):
+        memory = self._memory
+        for position in positions:
+            if not memory[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _clear(self, generation):
+        offset = self._generation_offset(generation)
+        self._memory[offset:offset + self._generation_bytes] = bytes(self._generation_bytes)
+
+    def _maybe_rotate(self):
+        """Rotate generations if due; returns (current generation, keys in it). Caller holds the lock"""
+        current, count, rotated_at = self._header.unpack_from(self._memory, 0)
+        now = time.monotonic()
+        if now - rotated_at >= self.window_seconds / 2 or count >= self.capacity:
+            current = 1 - current
+            self._clear(current)
+            if now - rotated_at >= self.window_seconds:
+                self._clear(1 - current)
+            count = 0
+            self._header.pack_into(self._memory, 0, current, count, now)
+        return current, count
@@ -0,0 +1,216 @@
+"""
+Periodized Program Generator
+Principles: Block periodization, planned deloads, and week-by-week progression
+
+Weeks are computed on demand from their index, so any week range can be
+produced without building the weeks before it and memory stays flat no
+matter how long the program is.
+
+Loads are %1RM derived from each week's rep target and reps in reserve, so
+every prescription is performable. Rep targets wave within each block and
+reset with it; progress across blocks comes from the lifter's 1RM rising
+(re-test or estimate it each block), not from inflating the percentage.
+"""
+
+import math
+
+
+class ProgramGenerator:
+    def __init__(self, workout_suggester):
+        self.workout_suggester = workout_suggester
+
+        self.min_weeks = 12
+        self.max_weeks = 52
+
+        # Block length includes the closing deload week; deload_load scales the block's first-week load
+        self.block_params = {
+            'strength': {'block_length': 4, 'deload_load': 0.90, 'deload_volume': 0.6, 'rep_style': 'descending'},
+            'hypertrophy': {'block_length': 6, 'deload_load': 0.80, 'deload_volume': 0.5, 'rep_style': 'double'},
+            'endurance': {'block_length': 6, 'deload_load': 0.85, 'deload_volume': 0.6, 'rep_style': 'ascending'},
+            'weight_loss': {'block_length': 5, 'deload_load': 0.85, 'deload_volume': 0.6, 'rep_style': 'double'}
+        }
+
+        self.max_load = 0.95
+
+    def build_program(self, goal, experience, equipment, days_per_week, weeks=12, session_duration=60,
+                      gender='male'):
+        """Build the program header and base week; weeks themselves are generated lazily"""
+        if not self.min_weeks <= weeks <= self.max_weeks:
+            raise ValueError(f'weeks must be between {self.min_weeks} and {self.max_weeks}')
+
+        block = self.block_params[goal]
+
+        # Fit the days once against the longest rep target of a block, so every week fits
+        # session_duration with the same exercise list
+        params = self.workout_suggester.goal_params[goal]
+        build_weeks = block['block_length'] - 1
+        longest_reps = max((self._week_reps(params['rep_range'], block['rep_style'], position, build_weeks, False)
+                            for position in range(1, block['block_length'])), key=_rep_midpoint)
+
+        base_plan = self.workout_suggester.generate_plan(goal, experience, equipment, days_per_week,
+                                                         session_duration=session_duration, gender=gender,
+                                                         fit_reps=longest_reps)
+
+        return {
+            'goal': goal,
+            'experience': experience,
+            'weeks': weeks,
+            'session_duration': session_duration,
+            'block_length': block['block_length'],
+            'deload_weeks': [w for w in range(block['block_length'], weeks + 1, block['block_length'])],
+            'split': base_plan['split'],
+            'base_workouts': base_plan['workouts'],
+            'parameters': base_plan['parameters']
+        }
+
+    def program_header(self, program):
+        """Program summary without the base workouts, used as the first streamed record"""
+        return {
+            'type': 'program',
+            'goal': program['goal'],
+            'experience': program['experience'],
+            'weeks': program['weeks'],
+            'block_length': program['block_length'],
+            'deload_weeks': program['deload_weeks'],
+            'split': program['split'],
+            'parameters': program['parameters']
+        }
+
+    def iter_weeks(self, program, start_week=1, end_week=None):
+        """Yield weeks start_week..end_week (inclusive) one at a time"""
+        end_week = program['weeks'] if end_week is None else min(end_week, program['weeks'])
+        start_week = max(1, start_week)
+
+        for week in range(start_week, end_week + 1):
+            yield self.get_week(program, week)
+
+    def get_week(self, program, week):
+        """Compute a single week directly from its index"""
+        if not 1 <= week <= program['weeks']:
+            raise ValueError(f"week must be between 1 and {program['weeks']}")
+
+        goal = program['goal']
+        block = self.block_params[goal]
+        params = self.workout_suggester.goal_params[goal]
+        volume_multiplier = self.workout_suggester.experience_volume[program['experience']]
+
+        block_length = block['block_length']
+        block_number = (week - 1) // block_length + 1
+        position = (week - 1) % block_length + 1
+        deload = position == block_length
+        build_weeks = block_length - 1
+
+        reps = self._week_reps(params['rep_range'], block['rep_style'], position, build_weeks, deload)
+        rir = params['rir'] + 3 if deload else params['rir'] + max(0, build_weeks - position) // 2
+
+        if deload:
+            first_reps = self._week_reps(params['rep_range'], block['rep_style'], 1, build_weeks, False)
+            load = self._load_for_reps(first_reps, params['rir'] + max(0, build_weeks - 1) // 2)
+            load *= block['deload_load']
+            phase = 'deload'
+        else:
+            load = self._load_for_reps(reps, rir)
+            phase = 'accumulation' if position <= (build_weeks + 1) // 2 else 'intensification'
+        load = round(load, 3)
+
+        # Advanced lifters tolerate an extra set late in the block, beginners hold volume flat
+        extra_sets = 1 if phase == 'intensification' and volume_multiplier > 1.0 else 0
+
+        workouts = []
+        for day in program['base_workouts']:
+            prescriptions = []
+            for item in day['exercises']:
+                if deload:
+                    sets = max(1, round(item['sets'] * block['deload_volume']))
+                else:
+                    sets = item['sets']
+                prescriptions.append((item, sets, item['reps'] if item['reps'].endswith('s') else reps))
+
+            if extra_sets:
+                prescriptions = self._add_extra_sets(prescriptions, extra_sets, program['session_duration'])
+
+            exercises = []
+            for item, sets, item_reps in prescriptions:
+                exercises.append({
+                    'exercise_id': item['exercise']['id'],
+                    'name': item['exercise']['name'],
+                    'sets': sets,
+                    'reps': item_reps,
+                    'load_percent_1rm': load if item['exercise']['type'] == 'compound' else None,
+                    'rest_seconds': item['rest_seconds'],
+                    'repsInReserve': rir
+                })
+            workouts.append({'day': day['day'], 'exercises': exercises,
+                             'estimated_minutes': self._estimate_minutes(prescriptions)})
+
+        return {
+            'type': 'week',
+            'week': week,
+            'block': block_number,
+            'phase': phase,
+            'deload': deload,
+            'load_percent_1rm': load,
+            'reps': reps,
+            'repsInReserve': rir,
+            'workouts': workouts
+        }
+
+    def _add_extra_sets(self, prescriptions, extra_sets, session_duration):
+        """Add extra sets to compound lifts, in plan order, while the day stays within session_duration"""
+        builder = self.workout_suggester.session_builder
+        remaining = session_duration * 60 - self._estimate_seconds(prescriptions)
+
+        adjusted = []
+        for item, sets, reps in prescriptions:
+            if item['exercise']['type'] == 'compound':
+                set_seconds = builder.extra_set_seconds(item['exercise'], reps)
+                added = max(0, min(extra_sets, int(remaining // set_seconds)))
+                sets += added
+                remaining -= added * set_seconds
+            adjusted.append((item, sets, reps))
+        return adjusted
+
+    def _estimate_seconds(self, prescriptions):
+        """Session time for (item, sets, reps) prescriptions, as estimated by the session builder"""
+        builder = self.workout_suggester.session_builder
+        return builder.general_warmup_seconds + sum(
+            builder.estimate_exercise_seconds(item['exercise'], sets, reps, item['warmup_sets'])
+            for item, sets, reps in prescriptions
+        )
+
+    def _estimate_minutes(self, prescriptions):
+        return math.ceil(self._estimate_seconds(prescriptions) / 60)
+
+    def _load_for_reps(self, reps, rir):
+        """%1RM that leaves `rir` reps in reserve at the low end of a rep target (Epley),
+        capped at max_load"""
+        reps_to_failure = int(reps.split('-')[0]) + rir
+        return min(self.max_load, 1 / (1 + reps_to_failure / 30))
+
+    def _week_reps(self, rep_range, rep_style, position, build_weeks, deload):
+        """Rep target for a week within its block"""
+        low, high = rep_range
+        if deload:
+            return f"{low}-{high}"
+
+        span = high - low
+        progress = (position - 1) / max(1, build_weeks - 1)
+
+        if rep_style == 'descending':
+            # Strength: heavier loads, fewer reps as the block goes on
+            target = round(high - span * progress)
+        elif rep_style == 'ascending':
+            # Endurance: add reps each week at a fixed load
+            target = round(low + span * progress)
+        else:
+            # Double progression: climb the rep range, load resets next block
+            target = round(low + span * progress)
+            return f"{target}-{high}" if target < high else str(high)
+
+        return str(target)
+
+
+def _rep_midpoint(reps):
+    """Midpoint of a rep target like '8-12' or '6'"""
+    bounds = [int(part) for part in reps.split('-')]
+    return sum(bounds) / len(bounds)
@@ -0,0 +1,237 @@
+"""
+Time-Budgeted Session Builder
+Fits each training day into session_duration by choosing exercises and set counts
+
+Each day is solved as a multiple-choice knapsack: every planned exercise slot
+may be dropped, kept with fewer sets, or swapped for a faster exercise from the
+same movement category. Training a muscle group at all earns a coverage value
+that outweighs any extra depth, so short sessions keep every group (with any
+of its exercises) before adding more work elsewhere. The DP runs over time in
+fixed steps with NumPy, and a hard solve-time cap per request falls back to a
+greedy fill.
+"""
+
+import math
+import time
+
+import numpy as np
+
+
+class SessionBuilder:
+    def __init__(self, exercise_database, max_solve_ms=5.0):
+        self.max_solve_ms = max_solve_ms
+
+        self.seconds_per_rep = 3
+        self.transition_seconds = 60      # Setting up / moving between stations
+        self.warmup_set_seconds = 60      # Light ramp-up set including short rest
+        self.general_warmup_seconds = 300
+        self.time_step_seconds = 15       # DP resolution
+
+        self.min_sets = 2
+        self.slot_values = [10.0, 6.0, 3.0]  # 1st, 2nd, 3rd+ exercise for a muscle group
+        self.coverage_value = 100.0          # Once per muscle group with any exercise kept
+        self.compound_bonus = 1.25
+        self.substitute_penalty = 0.9
+
+        self.category_index = self._build_category_index(exercise_database)
+
+    def _build_category_index(self, exercise_database):
+        """Index exercises by movement category, fastest (shortest rest) first"""
+        index = {}
+        for exercise in exercise_database:
+            index.setdefault(exercise.get('category'), []).append(exercise)
+        for exercises in index.values():
+            exercises.sort(key=lambda e: e.get('rest', 60))
+        return index
+
+    def estimate_exercise_seconds(self, exercise, sets, reps, warmup_sets):
+        """Estimate time for one exercise from sets, reps, rest and warmups"""
+        rest = exercise.get('rest', 60)
+        work = sets * self._rep_seconds(reps) + max(0, sets - 1) * rest
+        warmup = self._warmup_count(warmup_sets) * self.warmup_set_seconds
+        return work + warmup + self.transition_seconds
+
+    def extra_set_seconds(self, exercise, reps):
+        """Time one more working set adds: the set itself plus the rest before it"""
+        return self._rep_seconds(reps) + exercise.get('rest', 60)
+
+    def solve_deadline(self):
+        """Deadline for one request's solves; share it across all days of a plan"""
+        return time.perf_counter() + self.max_solve_ms / 1000
+
+    def fit_day(self, workout, session_duration, allowed_ids, deadline=None):
+        """Fit a day's exercises into session_duration minutes, solving optimally until `deadline`"""
+        budget = session_duration * 60 - self.general_warmup_seconds
+        capacity = max(0, int(budget // self.time_step_seconds))
+        slots, groups = self._build_slots(workout['exercises'], allowed_ids)
+
+        full_cost = sum(slot[0]['cost'] for slot in slots)
+        if full_cost <= capacity:
+            choices = [0] * len(slots)
+        else:
+            choices = self._solve(slots, groups, capacity, deadline or self.solve_deadline())
+            if choices is None:
+                choices = self._solve_greedy(slots, groups, capacity)
+
+        exercises = []
+        total_seconds = self.general_warmup_seconds
+        for slot, choice in zip(slots, choices):
+            if choice < 0:
+                continue
+            option = slot[choice]
+            exercises.append(option['entry'])
+            total_seconds += option['seconds']
+
+        return {
+            'day': workout['day'],
+            'exercises': exercises,
+            'estimated_minutes': math.ceil(total_seconds / 60)
+        }
+
+    def _build_slots(self, entries, allowed_ids):
+        """Candidate (exercise, sets) options per planned slot, full prescription first,
+        plus the muscle group index of each slot"""
+        slots = []
+        groups = []
+        group_position = {}
+        group_index = {}
+
+        for entry in entries:
+            exercise = entry['exercise']
+            muscle_group = exercise['muscle_group']
+            position = group_position.get(muscle_group, 0)
+            group_position[muscle_group] = position + 1
+            groups.append(group_index.setdefault(muscle_group, len(group_index)))
+
+            value = self.slot_values[min(position, len(self.slot_values) - 1)]
+            if exercise['type'] == 'compound':
+                value *= self.compound_bonus
+
+            candidates = [(entry, 1.0)]
+            substitute = self._fastest_substitute(exercise, allowed_ids)
+            if substitute is not None:
+                candidates.append((self._substitute_entry(entry, substitute), self.substitute_penalty))
+
+            options = []
+            for candidate, preference in candidates:
+                target_sets = candidate['sets']
+                for sets in range(target_sets, min(self.min_sets, target_sets) - 1, -1):
+                    seconds = self.estimate_exercise_seconds(candidate['exercise'], sets, candidate['reps'],
+                                                             candidate['warmup_sets'])
+                    options.append({
+                        'entry': candidate if sets == target_sets else dict(candidate, sets=sets),
+                        'seconds': seconds,
+                        'cost': math.ceil(seconds / self.time_step_seconds),
+                        'value': value * preference * math.sqrt(sets / target_sets)
+                    })
+            slots.append(options)
+
+        return slots, groups
+
+    def _fastest_substitute(self, exercise, allowed_ids):
+        """Fastest allowed exercise in the same category that rests less than the original"""
+        for candidate in self.category_index.get(exercise.get('category'), []):
+            if candidate.get('rest', 60) >= exercise.get('rest', 60):
+                return None
+            if candidate['id'] in allowed_ids and candidate['id'] != exercise['id']:
+                return candidate
+        return None
+
+    def _substitute_entry(self, entry, substitute):
+        """Copy a prescription onto a substitute exercise"""
+        warmup_sets = entry['warmup_sets']
+        if substitute['type'] != entry['exercise']['type']:
+            warmup_sets = '1-2 sets' if substitute['type'] == 'compound' else 'Optional'
+        return dict(entry, exercise=substitute, rest_seconds=substitute.get('rest', 60), warmup_sets=warmup_sets)
+
+    def _solve(self, slots, groups, capacity, deadline):
+        """Multiple-choice knapsack DP over time with a coverage term per muscle group;
+        returns option index per slot (-1 = dropped)
+
+        Slots are visited group by group with two states per time step: the best
+        value with the current group still untrained, and with it trained. Picking
+        from the untrained state earns the group's coverage value.
+        """
+        order = sorted(range(len(slots)), key=lambda k: groups[k])
+        untrained = np.zeros(capacity + 1)
+        trained = np.full(capacity + 1, -np.inf)
+        picks, sources, merges = [], [], {}
+
+        for position, k in enumerate(order):
+            if time.perf_counter() > deadline:
+                return None
+            if position > 0 and groups[k] != groups[order[position - 1]]:
+                merges[position] = trained > untrained
+                untrained = np.maximum(untrained, trained)
+                trained = np.full(capacity + 1, -np.inf)
+
+            current = trained.copy()
+            pick = np.full(capacity + 1, -1, dtype=np.int16)
+            source = np.zeros(capacity + 1, dtype=bool)  # True: picked from the untrained state
+            for i, option in enumerate(slots[k]):
+                cost = option['cost']
+                if cost > capacity:
+                    continue
+                from_trained = trained[:capacity + 1 - cost] + option['value']
+                from_untrained = untrained[:capacity + 1 - cost] + option['value'] + self.coverage_value
+                first = from_untrained > from_trained
+                candidate = np.where(first, from_untrained, from_trained)
+                better = candidate > current[cost:]
+                current[cost:] = np.where(better, candidate, current[cost:])
+                pick[cost:][better] = i
+                source[cost:][better] = first[better]
+            picks.append(pick)
+            sources.append(source)
+            trained = current
+
+        choices = [-1] * len(slots)
+        remaining = capacity
+        in_trained = bool(trained[remaining] > untrained[remaining])
+        for position in range(len(order) - 1, -1, -1):
+            k = order[position]
+            if in_trained:
+                choice = int(picks[position][remaining])
+                if choice >= 0:
+                    choices[k] = choice
+                    in_trained = not sources[position][remaining]
+                    remaining -= slots[k][choice]['cost']
+            if position in merges:
+                in_trained = bool(merges[position][remaining])
+        return choices
+
+    def _solve_greedy(self, slots, groups, capacity):
+        """Fallback: cover each muscle group with its cheapest fitting option, then take the best
+        value-per-time option for the remaining slots while time remains"""
+        choices = [-1] * len(slots)
+        remaining = capacity
+
+        for group in dict.fromkeys(groups):
+            fitting = [(o['cost'], -o['value'], k, i) for k in range(len(slots)) if groups[k] == group
+                       for i, o in enumerate(slots[k]) if o['cost'] <= remaining]
+            if fitting:
+                cost, _, k, i = min(fitting)
+                choices[k] = i
+                remaining -= cost
+
+        order = sorted((k for k in range(len(slots)) if choices[k] < 0), key=lambda k: -slots[k][0]['value'])
+        for k in order:
+            fitting = [(o['value'] / o['cost'], i) for i, o in enumerate(slots[k]) if o['cost'] <= remaining]
+            if fitting:
+                _, choice = max(fitting)
+                choices[k] = choice
+                remaining -= slots[k][choice]['cost']
+        return choices
+
+    def _rep_seconds(self, reps):
+        """Seconds of work for one set given a reps string like '8-12' or '30-60s'"""
+        reps = str(reps)
+        timed = reps.endswith('s')
+        bounds = [int(part) for part in reps.rstrip('s').split('-')]
+        midpoint = sum(bounds) / len(bounds)
+        return midpoint if timed else midpoint * self.seconds_per_rep
+
+    def _warmup_count(self, warmup_sets):
+        """Number of warmup sets implied by the prescription"""
+        if warmup_sets == '1-2 sets':
+            return 2
+        return 0
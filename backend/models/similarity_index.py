@@ -0,0 +1,106 @@
+"""
+Exercise Similarity Index
+Precomputed feature arrays for fast "something like X" substitution search
+
+Built once when the catalog loads. Each exercise is encoded as integer codes
+(category, subcategory, type, difficulty) and an equipment bitset using the
+same bits as request validation. A query scores only the exercise's muscle
+group with vectorized NumPy ops, filters by equipment and experience, and
+takes the top-k with argpartition.
+"""
+
+import numpy as np
+
+from utils.validation import EQUIPMENT_BITS
+
+
+class ExerciseSimilarityIndex:
+    def __init__(self, exercise_database):
+        self.exercise_database = exercise_database
+
+        self.weights = {'category': 4.0, 'subcategory': 2.0, 'type': 1.0, 'difficulty': 0.5, 'equipment': 1.5}
+        self.difficulty_levels = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+        self.equipment_bits = dict(EQUIPMENT_BITS)
+        self._build(exercise_database)
+
+    def _build(self, exercise_database):
+        vocabularies = {'category': {}, 'subcategory': {}, 'type': {}}
+
+        def code(field, value):
+            if value is None:
+                return -1
+            return vocabularies[field].setdefault(value, len(vocabularies[field]))
+
+        size = len(exercise_database)
+        self.category = np.empty(size, dtype=np.int32)
+        self.subcategory = np.empty(size, dtype=np.int32)
+        self.type = np.empty(size, dtype=np.int32)
+        self.difficulty = np.empty(size, dtype=np.int8)
+        self.equipment = np.empty(size, dtype=np.int64)
+        self.position = {}
+        groups = {}
+
+        for i, exercise in enumerate(exercise_database):
+            self.position[exercise['id']] = i
+            groups.setdefault(exercise['muscle_group'], []).append(i)
+
+            self.category[i] = code('category', exercise.get('category'))
+            self.subcategory[i] = code('subcategory', exercise.get('subcategory'))
+            self.type[i] = code('type', exercise.get('type'))
+            self.difficulty[i] = self.difficulty_levels.get(exercise.get('difficulty'), 0)
+
+            mask = 0
+            for item in exercise['equipment']:
+                if item not in self.equipment_bits:
+                    self.equipment_bits[item] = 1 << len(self.equipment_bits)
+                mask |= self.equipment_bits[item]
+            self.equipment[i] = mask
+
+        self.group_indices = {group: np.array(indices, dtype=np.int64) for group, indices in groups.items()}
+        self._max_score = (self.weights['category'] + self.weights['subcategory'] + self.weights['type'] +
+                           self.weights['equipment'])
+
+    def alternatives(self, exercise_id, equipment_mask=None, experience=None, k=5):
+        """Top-k most similar exercises for the same muscle group, best first"""
+        i = self.position[exercise_id]
+        candidates = self.group_indices[self.exercise_database[i]['muscle_group']]
+
+        eligible = candidates != i
+        if equipment_mask is not None:
+            # Same rule as plan generation: usable if any required item is available
+            eligible &= (self.equipment[candidates] & equipment_mask) != 0
+        if experience is not None:
+            eligible &= self.difficulty[candidates] <= self.difficulty_levels[experience]
+        candidates = candidates[eligible]
+        if candidates.size == 0:
+            return []
+
+        shared = _popcount(self.equipment[candidates] & self.equipment[i])
+        combined = _popcount(self.equipment[candidates] | self.equipment[i])
+
+        scores = (self.weights['category'] * (self.category[candidates] == self.category[i]) +
+                  self.weights['subcategory'] * ((self.subcategory[candidates] == self.subcategory[i]) &
+                                                 (self.subcategory[i] >= 0)) +
+                  self.weights['type'] * (self.type[candidates] == self.type[i]) -
+                  self.weights['difficulty'] * np.abs(self.difficulty[candidates] - self.difficulty[i]) +
+                  self.weights['equipment'] * shared / np.maximum(combined, 1))
+
+        k = min(k, candidates.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return [{
+            'exercise': self.exercise_database[candidates[j]],
+            'similarity': round(float(scores[j]) / self._max_score, 3)
+        } for j in top]
+
+
+def _popcount(values):
+    """Vectorized popcount for int64 bitsets"""
+    values = values.astype(np.uint64)
+    count = np.zeros(values.shape, dtype=np.int64)
+    while values.any():
+        count += (values & np.uint64(1)).astype(np.int64)
+        values >>= np.uint64(1)
+    return count
@@ -7,6 +7,9 @@ import numpy as np
 import torch
 import torch.nn as nn
 
+from models.session_builder import SessionBuilder
+from models.similarity_index import ExerciseSimilarityIndex
+
 # TODO: Train PyTorch model on real user data for exercise selection
 
 
@@ -34,6 +37,8 @@ class WorkoutSuggester:
     def __init__(self):
         self.exercise_database = self._load_exercise_database()
         self.pytorch_model = self._build_pytorch_model()
+        self.session_builder = SessionBuilder(self.exercise_database)
+        self.similarity_index = ExerciseSimilarityIndex(self.exercise_database)
 
         self.goal_params = {
             'strength': {'rep_range': (3, 6), 'sets': 4, 'compound_rest': 180, 'isolation_rest': 120, 'rir': 1},
@@ -150,8 +155,13 @@ class WorkoutSuggester:
              'difficulty': 'beginner', 'type': 'isolation', 'category': 'core', 'rest': 60}
         ]
 
-    def generate_plan(self, goal, experience, equipment, days_per_week, session_duration=60, gender='male'):
-        """Generate workout plan with gender-specific adjustments"""
+    def generate_plan(self, goal, experience, equipment, days_per_week, session_duration=60, gender='male',
+                      fit_reps=None):
+        """Generate workout plan with gender-specific adjustments
+
+        fit_reps overrides the rep target of non-timed exercises before the days
+        are fitted to session_duration (programs fit against their longest week).
+        """
         split = self._select_optimal_split(days_per_week, experience)
         available_exercises = self._filter_exercises(equipment, experience)
         params = self.goal_params[goal]
@@ -164,6 +174,16 @@ class WorkoutSuggester:
 
         workouts = self._select_exercises_intelligently(split, available_exercises, params, volume_multiplier,
                                                        goal, gender_focus.get(gender, gender_focus['male']))
+
+        if fit_reps is not None:
+            workouts = [dict(w, exercises=[e if e['reps'].endswith('s') else dict(e, reps=fit_reps)
+                                           for e in w['exercises']]) for w in workouts]
+
+        allowed_ids = {e['id'] for e in available_exercises}
+        deadline = self.session_builder.solve_deadline()
+        workouts = [self.session_builder.fit_day(w, session_duration, allowed_ids, deadline) for w in workouts]
+        estimated_duration = max((w['estimated_minutes'] for w in workouts), default=0)
+
         progression = self._create_progression_plan(goal, experience)
 
         return {
@@ -171,7 +191,8 @@ class WorkoutSuggester:
             'workouts': workouts,
             'progression': progression,
             'parameters': {'goal': goal, 'experience': experience, 'days_per_week': days_per_week,
-                         'estimated_duration': session_duration, 'gender': gender}
+                         'session_duration': session_duration, 'estimated_duration': estimated_duration,
+                         'gender': gender}
         }
 
     def _select_optimal_split(self, days_per_week, experience):
@@ -332,6 +353,10 @@ class WorkoutSuggester:
 
         return progression
 
+    def find_alternatives(self, exercise_id, equipment=None, experience=None, k=5):
+        """Most similar substitutes for an exercise, filtered by equipment bitmask and experience"""
+        return self.similarity_index.alternatives(exercise_id, equipment_mask=equipment, experience=experience, k=k)
+
     def get_exercise_database(self):
         """Return exercise database"""
         return self.exercise_database
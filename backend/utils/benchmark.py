@@ -0,0 +1,239 @@
+"""
+Benchmark script for FitMentor backend hot paths
+Run this to check per-request costs stay within budget
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.calorie_calculator import CalorieCalculator
+from models.workout_suggester import WorkoutSuggester
+from models.session_builder import SessionBuilder
+from models.dedup_filter import SlidingBloomFilter
+from models.similarity_index import ExerciseSimilarityIndex
+from utils.result_cache import LocalResultCache, SharedResultCache
+from utils.rate_limiter import AdmissionController, LocalBucketStore, SharedBucketStore
+from utils.validation import CALORIE_SCHEMA, WORKOUT_SCHEMA, encode_equipment
+
+
+def _time_per_call(fn, iterations):
+    """Average wall time per call in microseconds"""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _synthetic_catalog(base_catalog, size):
+    """Grow the real catalog to `size` entries by cloning with varied rest periods"""
+    catalog = []
+    for i in range(size):
+        template = base_catalog[i % len(base_catalog)]
+        catalog.append(dict(template, id=i + 1, name=f"{template['name']} #{i + 1}",
+                            rest=max(30, template['rest'] - 15 * (i // len(base_catalog) % 5))))
+    return catalog
+
+
+def benchmark_session_builder():
+    """Benchmark fitting days into a time budget with a large catalog"""
+    print("\n" + "="*50)
+    print("Benchmarking Session Builder")
+    print("="*50)
+
+    suggester = WorkoutSuggester()
+    equipment = ['barbell', 'dumbbell', 'cable', 'machine', 'bench', 'rack', 'pullup_bar', 'bodyweight']
+    base_plan = suggester.generate_plan('hypertrophy', 'advanced', equipment, 4, session_duration=240)
+
+    for size in [len(suggester.exercise_database), 1000, 5000, 20000]:
+        catalog = _synthetic_catalog(suggester.exercise_database, size)
+        builder = SessionBuilder(catalog)
+        allowed_ids = {e['id'] for e in catalog}
+
+        for duration in [45, 60, 90]:
+            per_day = _time_per_call(
+                lambda: [builder.fit_day(w, duration, allowed_ids) for w in base_plan['workouts']], 200
+            ) / len(base_plan['workouts'])
+            print(f"  catalog={size:>6} duration={duration:>3}min: {per_day:8.1f} µs/day")
+
+
+def benchmark_validation():
+    """Benchmark per-request schema validation and normalization"""
+    print("\n" + "="*50)
+    print("Benchmarking Request Validation")
+    print("="*50)
+
+    calorie_request = {'age': '25', 'height': 175.04, 'weight': 75, 'gender': 'Male',
+                       'activity_level': 'moderate', 'goal': 'gain'}
+    workout_request = {'gender': 'female', 'goal': 'hypertrophy', 'experience': 'Intermediate',
+                       'equipment': ['dumbbell', 'barbell', 'bench', 'dumbbell'], 'days_per_week': 4}
+    invalid_request = {'gender': 'female', 'goal': 'bulk', 'experience': 'intermediate',
+                       'equipment': ['barbell'], 'days_per_week': 4}
+
+    def validate_invalid():
+        try:
+            WORKOUT_SCHEMA.validate(invalid_request)
+        except ValueError:
+            pass
+
+    print(f"  calorie request:  {_time_per_call(lambda: CALORIE_SCHEMA.validate(calorie_request), 100000):6.2f} µs")
+    print(f"  workout request:  {_time_per_call(lambda: WORKOUT_SCHEMA.validate(workout_request), 100000):6.2f} µs")
+    print(f"  rejected request: {_time_per_call(validate_invalid, 100000):6.2f} µs")
+
+
+def benchmark_admission():
+    """Benchmark admission control overhead per request"""
+    print("\n" + "="*50)
+    print("Benchmarking Admission Control")
+    print("="*50)
+
+    for store in [LocalBucketStore(), SharedBucketStore()]:
+        controller = AdmissionController(store, rate=1e9, burst=1e9)
+        clients = [f'client-{i}' for i in range(1000)]
+        state = {'i': 0}
+
+        def admit_and_release():
+            state['i'] += 1
+            if controller.admit(clients[state['i'] % len(clients)], '/api/suggest-workout') is None:
+                controller.release()
+
+        print(f"  {type(store).__name__:<18}: {_time_per_call(admit_and_release, 100000):6.2f} µs/request")
+
+
+def benchmark_dedup_filter():
+    """Measure duplicate-check cost, false-positive rate and memory"""
+    print("\n" + "="*50)
+    print("Benchmarking Dedup Filter")
+    print("="*50)
+
+    for capacity in [10000, 100000, 1000000]:
+        dedup = SlidingBloomFilter(capacity=capacity, window_seconds=3600)
+        state = {'i': 0}
+
+        def add_new():
+            state['i'] += 1
+            dedup.check_and_add(f'insert-{state["i"]}')
+
+        per_check = _time_per_call(add_new, capacity - 2)
+
+        probes = 100000
+        false_positives = sum(dedup.check_and_add(f'probe-{i}') for i in range(probes))
+        print(f"  capacity={capacity:>8}: {per_check:5.2f} µs/check, "
+              f"false positives {false_positives / probes:.4%}, "
+              f"memory {dedup.memory_bytes / 1024:,.0f} KiB ({dedup.num_hashes} hashes)")
+
+
+def benchmark_weight_projection():
+    """Benchmark vectorized multi-week weight projection"""
+    print("\n" + "="*50)
+    print("Benchmarking Weight Projection")
+    print("="*50)
+
+    calculator = CalorieCalculator()
+    activity_levels = list(calculator.activity_multipliers)
+    goals = list(calculator.goal_adjustments)
+
+    for users in [100, 1000, 10000]:
+        batch = {
+            'ages': [18 + i % 60 for i in range(users)],
+            'heights': [150 + i % 50 for i in range(users)],
+            'weights': [50 + i % 80 for i in range(users)],
+            'genders': ['male' if i % 2 else 'female' for i in range(users)],
+            'activity_levels': [activity_levels[i % len(activity_levels)] for i in range(users)],
+            'goals': [goals[i % len(goals)] for i in range(users)]
+        }
+        for weeks in [12, 52]:
+            per_call = _time_per_call(lambda: calculator.project_batch(weeks=weeks, **batch), 20)
+            print(f"  users={users:>6} weeks={weeks:>3}: {per_call / users:6.2f} µs/profile")
+
+
+def benchmark_similarity_index():
+    """Benchmark top-k alternative lookup on large catalogs"""
+    print("\n" + "="*50)
+    print("Benchmarking Similarity Index")
+    print("="*50)
+
+    suggester = WorkoutSuggester()
+    equipment_mask = encode_equipment(['dumbbell', 'bench', 'cable'])
+
+    for size in [len(suggester.exercise_database), 10000, 50000]:
+        catalog = _synthetic_catalog(suggester.exercise_database, size)
+        start = time.perf_counter()
+        index = ExerciseSimilarityIndex(catalog)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        per_query = _time_per_call(lambda: index.alternatives(11, equipment_mask, 'intermediate', k=5), 2000)
+        print(f"  catalog={size:>6}: build {build_ms:7.1f} ms, query {per_query:7.1f} µs")
+
+
+def benchmark_result_cache(workers=4, lookups=20000, distinct_requests=5000):
+    """Compare hit ratio and contention of the shared cache against per-process caches"""
+    print("\n" + "="*50)
+    print("Benchmarking Result Cache")
+    print("="*50)
+
+    suggester = WorkoutSuggester()
+    payload = json.dumps(suggester.generate_plan('hypertrophy', 'intermediate', ['barbell', 'dumbbell'], 4)).encode()
+    weights = [1 / rank for rank in range(1, distinct_requests + 1)]  # Zipf-like popularity
+
+    # Same total memory budget: the shared cache holds what all workers' private caches would
+    shared_capacity = 1024
+    caches = {
+        'per-process': lambda: LocalResultCache(max_entries=shared_capacity // workers),
+        'shared': lambda: SharedResultCache(sets=shared_capacity // 4, ways=4)
+    }
+
+    for name, make_cache in caches.items():
+        cache = make_cache() if name == 'shared' else None
+        pipes = []
+        for worker in range(workers):
+            read_fd, write_fd = os.pipe()
+            if os.fork() == 0:
+                os.close(read_fd)
+                worker_cache = cache or make_cache()
+                keys = random.Random(worker).choices(range(distinct_requests), weights, k=lookups)
+                start = time.process_time()  # CPU time, so workers sharing cores don't skew it
+                for key in keys:
+                    if worker_cache.get(('workout', key)) is None:
+                        worker_cache.put(('workout', key), payload)
+                stats = dict(worker_cache.stats(), seconds=time.process_time() - start)
+                os.write(write_fd, json.dumps(stats).encode())
+                os._exit(0)
+            os.close(write_fd)
+            pipes.append(read_fd)
+
+        results = []
+        for read_fd in pipes:
+            with os.fdopen(read_fd) as f:
+                results.append(json.loads(f.read()))
+            os.wait()
+
+        hits = sum(r['hits'] for r in results)
+        per_lookup = sum(r['seconds'] for r in results) / (workers * lookups) * 1e6
+        print(f"  {name:<12}: hit ratio {hits / (workers * lookups):.1%}, {per_lookup:5.1f} µs/lookup, "
+              f"read retries {sum(r['read_retries'] for r in results)}, "
+              f"write contention {sum(r['write_contention'] for r in results)}")
+
+
+def main():
+    print("\n" + "="*50)
+    print("FitMentor Benchmark Suite")
+    print("="*50)
+
+    benchmark_session_builder()
+    benchmark_validation()
+    benchmark_admission()
+    benchmark_dedup_filter()
+    benchmark_weight_projection()
+    benchmark_similarity_index()
+    benchmark_result_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Frontend build step for FitMentor
+Minifies, fingerprints and precompresses the assets referenced by index.html
+
+Output goes to frontend/dist/: assets/<name>.<hash>.<ext> plus .gz (and .br
+when the optional `brotli` package is installed), a rewritten index.html and
+manifest.json. The backend serves dist/ same-origin with immutable caching.
+Files not referenced by index.html (e.g. css/styles_new.css) are not shipped.
+images/ is copied as-is, since app.js loads exercise images by URL at runtime.
+
+Run from anywhere: python backend/utils/build_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip-only build
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend')
+DIST_DIR = os.path.join(FRONTEND_DIR, 'dist')
+
+ASSET_REFERENCE = re.compile(r'(?P<attr>href|src)="(?P<path>(?:css|js)/[^"]+)"')
+
+
+def minify_css(source):
+    """Strip comments and collapse whitespace around CSS punctuation"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};:,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Conservative: drop full-line comments, indentation and blank lines (keeps newlines for ASI)"""
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+def minify_html(source):
+    """Drop comments, indentation and blank lines"""
+    source = re.sub(r'<!--.*?-->', '', source, flags=re.S)
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write_variants(path, content):
+    """Write a file with its precompressed siblings; returns sizes per encoding"""
+    with open(path, 'wb') as f:
+        f.write(content)
+    sizes = {'identity': len(content)}
+
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(compressed)
+    sizes['gzip'] = len(compressed)
+
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(compressed)
+        sizes['br'] = len(compressed)
+    return sizes
+
+
+def build():
+    """Build dist/ and return a size report {logical path: {source, identity, gzip[, br]}}"""
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(os.path.join(DIST_DIR, 'assets'))
+
+    with open(os.path.join(FRONTEND_DIR, 'index.html'), 'r') as f:
+        html = f.read()
+
+    manifest = {}
+    report = {}
+    for path in sorted(set(m.group('path') for m in ASSET_REFERENCE.finditer(html))):
+        with open(os.path.join(FRONTEND_DIR, path), 'r') as f:
+            source = f.read()
+
+        name, ext = os.path.splitext(os.path.basename(path))
+        content = MINIFIERS.get(ext, lambda s: s)(source).encode('utf-8')
+        fingerprint = hashlib.sha256(content).hexdigest()[:12]
+        filename = f'{name}.{fingerprint}{ext}'
+
+        manifest[path] = f'/assets/{filename}'
+        report[path] = dict(_write_variants(os.path.join(DIST_DIR, 'assets', filename), content),
+                            source=len(source.encode('utf-8')))
+
+    html_out = minify_html(ASSET_REFERENCE.sub(lambda m: f'{m.group("attr")}="{manifest[m.group("path")]}"', html))
+    report['index.html'] = dict(_write_variants(os.path.join(DIST_DIR, 'index.html'), html_out.encode('utf-8')),
+                                source=len(html.encode('utf-8')))
+
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    images_dir = os.path.join(FRONTEND_DIR, 'images')
+    if os.path.isdir(images_dir):
+        shutil.copytree(images_dir, os.path.join(DIST_DIR, 'images'))
+
+    return report
+
+
+def main():
+    report = build()
+
+    print("\n" + "="*50)
+    print("FitMentor Frontend Build")
+    print("="*50)
+
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    print(f"\n  {'file':<16}{'source':>10}" + ''.join(f'{e:>10}' for e in encodings))
+    totals = {key: 0 for key in ['source'] + encodings}
+    for path, sizes in report.items():
+        print(f"  {path:<16}{sizes['source']:>10}" + ''.join(f'{sizes[e]:>10}' for e in encodings))
+        for key in totals:
+            totals[key] += sizes[key]
+    print(f"  {'total':<16}{totals['source']:>10}" + ''.join(f'{totals[e]:>10}' for e in encodings))
+
+    best = encodings[-1]
+    print(f"\nFirst-visit transfer: {totals['source']:,} -> {totals[best]:,} bytes "
+          f"({1 - totals[best] / totals['source']:.0%} less, {best})")
+    print(f"Output: {os.path.normpath(DIST_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
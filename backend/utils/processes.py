@@ -0,0 +1,16 @@
+"""
+Process helpers shared by the per-worker shared-state modules
+"""
+
+import os
+
+
+def pid_alive(pid):
+    """Whether a process with this pid is running (it may belong to another user)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,251 @@
+"""
+Admission control for FitMentor API
+Per-client token buckets plus queue-depth load shedding with priority lanes
+
+SharedBucketStore keeps buckets and the in-flight counter in an anonymous
+shared mmap. Create it before the server forks its workers (e.g. gunicorn
+--preload) and every worker on the node enforces the same limits. In-flight
+requests are also counted per worker, so requests held by a worker that was
+killed mid-request (timeout, OOM) are reclaimed instead of leaking.
+LocalBucketStore is the single-process stand-in with the same interface.
+"""
+
+import hashlib
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+from utils.processes import pid_alive
+
+
+def _key_hash(key):
+    """Stable 64-bit hash of a client key (non-zero; zero marks an empty slot)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class LocalBucketStore:
+    """Token buckets held in this process only"""
+
+    def __init__(self, max_clients=65536):
+        self.max_clients = max_clients
+        self._buckets = {}
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost, now):
+        """Try to take `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            if key not in self._buckets and len(self._buckets) >= self.max_clients:
+                self._buckets.pop(next(iter(self._buckets)))
+            self._buckets[key] = (tokens, now)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def enter(self):
+        """Increment the in-flight counter and return the new depth"""
+        with self._lock:
+            self._inflight += 1
+            return self._inflight
+
+    def leave(self):
+        """Decrement the in-flight counter"""
+        with self._lock:
+            self._inflight -= 1
+
+    def reclaim(self):
+        """Nothing can leak within one process; returns the current depth"""
+        return self._inflight
+
+
+class SharedBucketStore:
+    """Token buckets in shared memory, visible to all forked workers"""
+
+    _header = struct.Struct('<q')        # in-flight requests
+    _worker = struct.Struct('<qq')       # worker pid, its in-flight requests
+    _slot = struct.Struct('<Qdd')        # key hash, tokens, last update
+    _group_size = 8                      # Slots a key may occupy; each group is guarded by one lock stripe
+
+    def __init__(self, max_clients=65536, lock_stripes=64, max_workers=256, reclaim_interval_seconds=1.0):
+        self.max_clients = max_clients
+        self.max_workers = max_workers
+        self.reclaim_interval_seconds = reclaim_interval_seconds
+        self._groups = max(1, max_clients // self._group_size)
+        self._buckets_offset = self._header.size + max_workers * self._worker.size
+        self._memory = mmap.mmap(-1, self._buckets_offset + self._groups * self._group_size * self._slot.size)
+        self._locks = [multiprocessing.Lock() for _ in range(lock_stripes)]
+        self._inflight_lock = multiprocessing.Lock()
+
+        self._worker_pid = None
+        self._worker_offset = None
+        self._reclaimed_at = 0.0
+
+    def take(self, key, rate, burst, cost, now):
+        """Try to take `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        key_hash = _key_hash(key)
+        group = key_hash % self._groups
+
+        with self._locks[group % len(self._locks)]:
+            offset, tokens, updated = self._find_slot(key_hash, group, burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._slot.pack_into(self._memory, offset, key_hash, tokens, now)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def _find_slot(self, key_hash, group, burst, now):
+        """Find the key in its slot group; otherwise claim an empty or the stalest slot"""
+        victim = None
+        first = self._buckets_offset + group * self._group_size * self._slot.size
+        for offset in range(first, first + self._group_size * self._slot.size, self._slot.size):
+            slot_hash, tokens, updated = self._slot.unpack_from(self._memory, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, updated
+            if slot_hash == 0:
+                return offset, burst, now
+            if victim is None or updated < victim[1]:
+                victim = (offset, updated)
+        return victim[0], burst, now
+
+    def enter(self):
+        """Increment the in-flight counter and return the new depth"""
+        with self._inflight_lock:
+            return self._add_inflight(1)
+
+    def leave(self):
+        """Decrement the in-flight counter"""
+        with self._inflight_lock:
+            self._add_inflight(-1)
+
+    def reclaim(self):
+        """Release in-flight requests held by dead workers (at most once per interval);
+        returns the current depth"""
+        with self._inflight_lock:
+            now = time.monotonic()
+            if now - self._reclaimed_at >= self.reclaim_interval_seconds:
+                self._reclaimed_at = now
+                for offset in self._worker_offsets():
+                    pid, count = self._worker.unpack_from(self._memory, offset)
+                    if pid and not pid_alive(pid):
+                        self._release_worker(offset, count)
+            return self._header.unpack_from(self._memory, 0)[0]
+
+    def _add_inflight(self, delta):
+        """Apply delta to the total and to this worker's count; caller holds the in-flight lock"""
+        offset = self._own_worker_offset()
+        if offset is not None:
+            pid, count = self._worker.unpack_from(self._memory, offset)
+            self._worker.pack_into(self._memory, offset, pid, max(0, count + delta))
+
+        depth = max(0, self._header.unpack_from(self._memory, 0)[0] + delta)
+        self._header.pack_into(self._memory, 0, depth)
+        return depth
+
+    def _own_worker_offset(self):
+        """This process's worker slot, claimed on first use after a fork"""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return self._worker_offset
+
+        free = None
+        for offset in self._worker_offsets():
+            slot_pid, count = self._worker.unpack_from(self._memory, offset)
+            if slot_pid == pid:
+                # A previous process with our pid died holding these; they are not ours
+                self._release_worker(offset, count)
+                free = offset
+                break
+            if free is None and (slot_pid == 0 or not pid_alive(slot_pid)):
+                free = offset
+        if free is not None:
+            slot_pid, count = self._worker.unpack_from(self._memory, free)
+            if slot_pid:
+                self._release_worker(free, count)
+            self._worker.pack_into(self._memory, free, pid, 0)
+
+        self._worker_pid, self._worker_offset = pid, free  # None: table full, count in the total only
+        return free
+
+    def _release_worker(self, offset, count):
+        depth = max(0, self._header.unpack_from(self._memory, 0)[0] - count)
+        self._header.pack_into(self._memory, 0, depth)
+        self._worker.pack_into(self._memory, offset, 0, 0)
+
+    def _worker_offsets(self):
+        return range(self._header.size, self._buckets_offset, self._worker.size)
+
+
+class AdmissionController:
+    """Decides whether a request may run: 429 when a client is over its rate, 503 when overloaded"""
+
+    def __init__(self, store, rate=5.0, burst=20, max_inflight=32, priority_max_inflight=64,
+                 priority_paths=('/api', '/api/exercises', '/api/stats', '/api/stats/workouts', '/api/stats/calories',
+                                 '/api/cache/stats'),
+                 endpoint_costs=None):
+        self.store = store
+        self.rate = rate                                    # Tokens refilled per second per client
+        self.burst = burst                                  # Bucket capacity
+        self.max_inflight = max_inflight                    # Shed normal requests beyond this depth
+        self.priority_max_inflight = priority_max_inflight  # Cheap endpoints keep a wider lane and their own bucket
+        self.priority_paths = frozenset(priority_paths)
+        self.endpoint_costs = endpoint_costs or {
+            '/api/suggest-workout': 2,
+            '/api/project-weight': 4,
+            '/api/generate-program': 4
+        }
+
+    def admit(self, client_key, path):
+        """Return None when admitted (caller must release()), else (status, retry_after, message)"""
+        priority = path in self.priority_paths
+        bucket_key = f'{client_key}|priority' if priority else client_key
+        allowed, wait = self.store.take(bucket_key, self.rate, self.burst,
+                                        self.endpoint_costs.get(path, 1), time.monotonic())
+        if not allowed:
+            return 429, max(1, math.ceil(wait)), 'Rate limit exceeded'
+
+        limit = self.priority_max_inflight if priority else self.max_inflight
+        depth = self.store.enter()
+        if depth > limit:
+            depth = self.store.reclaim()  # Workers killed mid-request never left
+        if depth > limit:
+            self.store.leave()
+            return 503, 1, 'Server busy, please retry'
+        return None
+
+    def release(self):
+        """Mark an admitted request as finished"""
+        self.store.leave()
+
+
+def client_identity(api_key, remote_addr, forwarded_for=None, api_keys=frozenset(), trusted_proxies=frozenset()):
+    """Rate-limit key for a request
+
+    An X-API-Key counts only when it is one of the configured api_keys; any
+    other key is ignored so clients cannot mint fresh buckets by rotating it.
+    Everyone else is keyed by address. X-Forwarded-For is honored only when the
+    connection comes from a trusted proxy, and then the client is the rightmost
+    hop that is not one of our proxies (earlier hops are client-supplied).
+    """
+    if api_key and api_key in api_keys:
+        return f'key:{api_key}'
+
+    address = remote_addr or 'anonymous'
+    if forwarded_for and address in trusted_proxies:
+        for hop in reversed(forwarded_for.split(',')):
+            hop = hop.strip()
+            if hop and hop not in trusted_proxies:
+                address = hop
+                break
+    return f'ip:{address}'
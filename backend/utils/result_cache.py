@@ -0,0 +1,168 @@
+"""
+Result cache for FitMentor API responses
+Serialized responses keyed by the normalized request (see utils.validation)
+
+SharedResultCache lives in an anonymous shared mmap created before the server
+forks, so every worker on the node reads and writes one cache. It is a
+set-associative table of fixed-size slots with approximate-LRU eviction.
+Reads take no lock: each slot carries a seqlock version that writers make odd
+while they update it, and readers retry if it changed under them. Writers
+lock only the set they write to. LocalResultCache is the per-process
+alternative with the same interface, used for comparison.
+"""
+
+import hashlib
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+
+def _key_digest(key):
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).digest()
+
+
+class _Metrics:
+    """Per-process counters for cache behaviour"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.oversize = 0
+        self.read_retries = 0       # Reader saw a slot change mid-copy
+        self.write_contention = 0   # Writer had to wait for another writer on the same set
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        metrics = dict(vars(self))
+        metrics['hit_ratio'] = round(self.hits / lookups, 4) if lookups else None
+        return metrics
+
+
+class LocalResultCache:
+    """LRU cache private to this process"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.metrics = _Metrics()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached payload bytes, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.metrics.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """Store payload bytes, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            self.metrics.stores += 1
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.evictions += 1
+
+    def stats(self):
+        return dict(self.metrics.to_dict(), backend='local', entries=len(self._entries),
+                    capacity=self.max_entries)
+
+
+class SharedResultCache:
+    """Cross-worker cache in shared memory with lock-free reads"""
+
+    _slot_header = struct.Struct('<Q16sIQ')  # seqlock version, key digest, payload length, last used (ns)
+    _max_read_attempts = 3
+
+    def __init__(self, sets=1024, ways=4, slot_bytes=4096, lock_stripes=64):
+        self.sets = sets
+        self.ways = ways
+        self.slot_bytes = slot_bytes
+        self.max_payload = slot_bytes - self._slot_header.size
+
+        self.metrics = _Metrics()
+        self._memory = mmap.mmap(-1, sets * ways * slot_bytes)
+        self._locks = [multiprocessing.Lock() for _ in range(lock_stripes)]
+
+    def _set_offsets(self, digest):
+        first = (int.from_bytes(digest[:8], 'little') % self.sets) * self.ways
+        return [(first + way) * self.slot_bytes for way in range(self.ways)]
+
+    def get(self, key):
+        """Cached payload bytes, or None; never blocks on writers"""
+        digest = _key_digest(key)
+        for offset in self._set_offsets(digest):
+            for _ in range(self._max_read_attempts):
+                version, slot_digest, length, _ = self._slot_header.unpack_from(self._memory, offset)
+                if version & 1:
+                    self.metrics.read_retries += 1
+                    continue
+                if slot_digest != digest:
+                    break
+
+                start = offset + self._slot_header.size
+                compressed = self._memory[start:start + length]
+                if self._slot_header.unpack_from(self._memory, offset)[0] != version:
+                    self.metrics.read_retries += 1
+                    continue
+
+                # Benign race: recency is approximate by design
+                struct.pack_into('<Q', self._memory, offset + self._slot_header.size - 8, time.monotonic_ns())
+                self.metrics.hits += 1
+                return zlib.decompress(compressed)
+
+        self.metrics.misses += 1
+        return None
+
+    def put(self, key, payload):
+        """Store payload bytes (compressed), replacing the stalest way of the set when full"""
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) > self.max_payload:
+            self.metrics.oversize += 1
+            return
+
+        digest = _key_digest(key)
+        offsets = self._set_offsets(digest)
+        lock = self._locks[(offsets[0] // (self.slot_bytes * self.ways)) % len(self._locks)]
+
+        if not lock.acquire(block=False):
+            self.metrics.write_contention += 1
+            lock.acquire()
+        try:
+            target, victim = None, None
+            for offset in offsets:
+                version, slot_digest, length, last_used = self._slot_header.unpack_from(self._memory, offset)
+                if slot_digest == digest or length == 0:
+                    target = offset
+                    break
+                if victim is None or last_used < victim[1]:
+                    victim = (offset, last_used)
+            if target is None:
+                target = victim[0]
+                self.metrics.evictions += 1
+
+            version = self._slot_header.unpack_from(self._memory, target)[0]
+            struct.pack_into('<Q', self._memory, target, version + 1)   # Odd: readers back off
+            start = target + self._slot_header.size
+            self._memory[start:start + len(compressed)] = compressed
+            self._slot_header.pack_into(self._memory, target, version + 1, digest, len(compressed),
+                                        time.monotonic_ns())
+            struct.pack_into('<Q', self._memory, target, version + 2)   # Even again: slot is consistent
+            self.metrics.stores += 1
+        finally:
+            lock.release()
+
+    def stats(self):
+        return dict(self.metrics.to_dict(), backend='shared', capacity=self.sets * self.ways,
+                    slot_bytes=self.slot_bytes)
@@ -0,0 +1,92 @@
+"""
+Static frontend serving for FitMentor
+Serves the built frontend (see build_assets.py) same-origin from the API
+
+The build is loaded into memory once at startup: each file with its
+precompressed variants, so restart the server after rebuilding. Fingerprinted
+assets are served with immutable caching; the HTML shell is revalidated by
+ETag on every visit so browsers switch to a new build as soon as it is served.
+Images are not fingerprinted and are served from dist/images uncached.
+Without a build, the raw frontend files are served uncached for development.
+"""
+
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort, send_from_directory
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+class StaticAssets:
+    def __init__(self, frontend_dir=FRONTEND_DIR):
+        self.frontend_dir = frontend_dir
+        self.dist_dir = os.path.join(frontend_dir, 'dist')
+        self.built = os.path.exists(os.path.join(self.dist_dir, 'index.html'))
+
+        self.files = {}
+        if self.built:
+            self.files['index.html'] = self._load(os.path.join(self.dist_dir, 'index.html'))
+            assets_dir = os.path.join(self.dist_dir, 'assets')
+            for filename in os.listdir(assets_dir):
+                if not filename.endswith(('.gz', '.br')):
+                    self.files[f'assets/{filename}'] = self._load(os.path.join(assets_dir, filename))
+
+    def _load(self, path):
+        """File contents per encoding plus mimetype and ETag"""
+        variants = {}
+        for encoding, suffix in [('identity', ''), ('gzip', '.gz'), ('br', '.br')]:
+            if os.path.exists(path + suffix):
+                with open(path + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+
+        return {
+            'variants': variants,
+            'mimetype': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            'etag': hashlib.sha256(variants['identity']).hexdigest()[:16]
+        }
+
+    def index_response(self, request):
+        """HTML shell: revalidated each visit, 304 when unchanged"""
+        if not self.built:
+            return send_from_directory(self.frontend_dir, 'index.html', max_age=0)
+        return self._response(self.files['index.html'], request, REVALIDATE)
+
+    def asset_response(self, filename, request):
+        """Fingerprinted asset with immutable caching"""
+        entry = self.files.get(f'assets/{filename}')
+        if entry is None:
+            abort(404)
+        return self._response(entry, request, IMMUTABLE)
+
+    def source_response(self, path):
+        """Unfingerprinted frontend file: images from the build, anything in development"""
+        if self.built:
+            if not path.startswith('images/'):
+                abort(404)
+            return send_from_directory(self.dist_dir, path, max_age=0)
+        return send_from_directory(self.frontend_dir, path, max_age=0)
+
+    def _response(self, entry, request, cache_control):
+        if request.if_none_match.contains(entry['etag']):
+            response = Response(status=304)
+        else:
+            encoding = self._negotiate(entry['variants'], request.accept_encodings)
+            response = Response(entry['variants'][encoding], mimetype=entry['mimetype'])
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    def _negotiate(self, variants, accept_encodings):
+        for encoding in ['br', 'gzip']:
+            if encoding in variants and accept_encodings[encoding] > 0:
+                return encoding
+        return 'identity'
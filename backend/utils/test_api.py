@@ -5,8 +5,21 @@ Run this to verify the API is working correctly
 
 import requests
 import json
+import random
+import re
+import uuid
 
 API_BASE_URL = "http://localhost:5000/api"
+SITE_URL = API_BASE_URL[:-len("/api")]
+
+# Tests that send bursts use their own rate-limit buckets; start the server with
+# FITMENTOR_API_KEYS set to these keys (comma-separated) so they are honored
+TEST_API_KEYS = {
+    "validation": "test-request-validation",
+    "program_loads": "test-program-loads",
+    "dedup": "test-dedup",
+    "admission": "test-admission"
+}
 
 def test_calorie_calculator():
     """Test calorie calculator endpoint"""
@@ -62,6 +75,53 @@ def test_calorie_calculator():
         return False
 
 
+def test_weight_projection():
+    """Test weight projection endpoint, including long deficits that must stop at a healthy floor"""
+    print("\n" + "="*50)
+    print("Testing Weight Projection")
+    print("="*50)
+
+    test_data = {
+        "weeks": 104,
+        "profiles": [
+            {"age": 30, "height": 180, "weight": 80, "gender": "male",
+             "activity_level": "moderate", "goal": "lose"},
+            {"age": 100, "height": 100, "weight": 30, "gender": "female",
+             "activity_level": "sedentary", "goal": "lose"}
+        ]
+    }
+
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/project-weight",
+            json=test_data
+        )
+        response.raise_for_status()
+
+        result = response.json()
+
+        for profile, projection in zip(test_data['profiles'], result['projections']):
+            floor_weight = min(profile['weight'], 18.5 * (profile['height'] / 100) ** 2)
+            print(f"\n  {profile['weight']} kg, {profile['height']} cm, age {profile['age']}:")
+            print(f"    Weight: {projection['weight'][0]} -> {projection['weight'][-1]} kg "
+                  f"(floor {floor_weight:.1f} kg)")
+            print(f"    Target calories: {projection['target_calories'][0]} -> {projection['target_calories'][-1]} kcal")
+
+            assert len(projection['weight']) == test_data['weeks'] + 1
+            assert min(projection['weight']) >= round(floor_weight, 1)
+            assert min(projection['target_calories']) > 0
+
+        print("\n✓ Weight Projection Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Weight Projection Test FAILED: {str(e)}")
+        return False
+
+
 def test_workout_suggester():
     """Test workout suggester endpoint"""
     print("\n" + "="*50)
@@ -117,6 +177,193 @@ def test_workout_suggester():
         return False
 
 
+def test_session_fitting():
+    """Test that every day of a plan fits a short session_duration"""
+    print("\n" + "="*50)
+    print("Testing Session Fitting")
+    print("="*50)
+
+    test_data = {
+        "gender": "male",
+        "goal": "strength",
+        "experience": "advanced",
+        "equipment": ["barbell", "dumbbell", "bench", "rack", "cable", "machine"],
+        "days_per_week": 4,
+        "session_duration": 20
+    }
+
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/suggest-workout",
+            json=test_data
+        )
+        response.raise_for_status()
+
+        result = response.json()
+
+        for workout in result['workouts']:
+            groups = sorted({ex['exercise']['muscle_group'] for ex in workout['exercises']})
+            print(f"  {workout['day']}: {workout['estimated_minutes']} min, {', '.join(groups)}")
+            assert workout['estimated_minutes'] <= test_data['session_duration']
+
+        longest = max(workout['estimated_minutes'] for workout in result['workouts'])
+        print(f"\nEstimated duration: {result['parameters']['estimated_duration']} min")
+        assert result['parameters']['estimated_duration'] == longest
+
+        print("\n✓ Session Fitting Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Session Fitting Test FAILED: {str(e)}")
+        return False
+
+
+def test_request_validation():
+    """Test that invalid workout requests are rejected with 400"""
+    print("\n" + "="*50)
+    print("Testing Request Validation")
+    print("="*50)
+
+    valid_data = {
+        "gender": "female",
+        "goal": "hypertrophy",
+        "experience": "intermediate",
+        "equipment": ["barbell", "dumbbell"],
+        "days_per_week": 4
+    }
+    invalid_fields = [
+        ("goal", "bulk"),
+        ("experience", "expert"),
+        ("days_per_week", "four"),
+        ("days_per_week", "--4"),
+        ("days_per_week", 4.5)
+    ]
+
+    try:
+        for field, value in invalid_fields:
+            response = requests.post(
+                f"{API_BASE_URL}/suggest-workout",
+                json=dict(valid_data, **{field: value}),
+                headers={"X-API-Key": TEST_API_KEYS["validation"]}  # Own rate-limit bucket for this burst
+            )
+            print(f"  {field}={value!r}: {response.status_code} {response.json()['error']}")
+            assert response.status_code == 400, f"expected 400 for {field}={value!r}"
+
+        print("\n✓ Request Validation Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Request Validation Test FAILED: {str(e)}")
+        return False
+
+
+def test_program_generator():
+    """Test streamed periodized program endpoint"""
+    print("\n" + "="*50)
+    print("Testing Program Generator")
+    print("="*50)
+
+    test_data = {
+        "gender": "male",
+        "goal": "strength",
+        "experience": "intermediate",
+        "equipment": ["barbell", "dumbbell", "bench", "rack"],
+        "days_per_week": 4,
+        "weeks": 16,
+        "start_week": 5,
+        "end_week": 8
+    }
+
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/generate-program",
+            json=test_data,
+            stream=True
+        )
+        response.raise_for_status()
+
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        header, weeks = lines[0], lines[1:]
+
+        print(f"\nProgram: {header['weeks']} weeks, blocks of {header['block_length']}")
+        print(f"  Deload weeks: {header['deload_weeks']}")
+        for week in weeks:
+            print(f"  Week {week['week']} ({week['phase']}): {week['reps']} reps @ {week['load_percent_1rm']:.0%} 1RM")
+
+        assert [w['week'] for w in weeks] == [5, 6, 7, 8]
+
+        print("\n✓ Program Generator Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Program Generator Test FAILED: {str(e)}")
+        return False
+
+
+def test_program_loads():
+    """Test that every week of a 52-week program prescribes a performable load for its reps"""
+    print("\n" + "="*50)
+    print("Testing Program Loads")
+    print("="*50)
+
+    test_data = {
+        "gender": "male",
+        "goal": "strength",
+        "experience": "advanced",
+        "equipment": ["barbell", "dumbbell", "bench", "rack"],
+        "days_per_week": 4,
+        "weeks": 52
+    }
+
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/generate-program",
+            json=test_data,
+            headers={"X-API-Key": TEST_API_KEYS["program_loads"]},  # Own rate-limit bucket: programs cost 4 tokens
+            stream=True
+        )
+        response.raise_for_status()
+
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        header, weeks = lines[0], lines[1:]
+        assert len(weeks) == 52
+
+        by_position = {}
+        for week in weeks:
+            # Heaviest load that still leaves repsInReserve at the low end of the rep target (Epley)
+            reps_to_failure = int(week['reps'].split('-')[0]) + week['repsInReserve']
+            assert week['load_percent_1rm'] <= 1 / (1 + reps_to_failure / 30) + 0.001, \
+                f"week {week['week']}: {week['reps']} reps @ {week['load_percent_1rm']:.0%} 1RM"
+            position = (week['week'] - 1) % header['block_length']
+            by_position.setdefault(position, set()).add(week['load_percent_1rm'])
+
+        # Loads reset with each block instead of creeping up, and deloads stay lighter
+        assert all(len(loads) == 1 for loads in by_position.values())
+        block_loads = [by_position[position].pop() for position in range(header['block_length'])]
+        assert block_loads[-1] < min(block_loads[:-1])
+
+        print(f"\n52 weeks, every block: {', '.join(f'{load:.0%}' for load in block_loads)} 1RM")
+
+        print("\n✓ Program Loads Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Program Loads Test FAILED: {str(e)}")
+        return False
+
+
 def test_exercise_database():
     """Test exercise database endpoint"""
     print("\n" + "="*50)
@@ -148,16 +395,283 @@ def test_exercise_database():
         return False
 
 
+def test_exercise_alternatives():
+    """Test exercise substitution endpoint"""
+    print("\n" + "="*50)
+    print("Testing Exercise Alternatives")
+    print("="*50)
+
+    try:
+        response = requests.get(
+            f"{API_BASE_URL}/exercises/11/alternatives",
+            params={"equipment": "dumbbell"}
+        )
+        response.raise_for_status()
+
+        result = response.json()
+
+        print("\nAlternatives to exercise 11 with dumbbells:")
+        for alternative in result['alternatives']:
+            print(f"  - {alternative['exercise']['name']} (similarity {alternative['similarity']})")
+
+        assert result['alternatives'][0]['exercise']['name'] == 'Dumbbell Rows'
+
+        response = requests.get(f"{API_BASE_URL}/exercises/9999/alternatives")
+        print(f"\nUnknown exercise: {response.status_code}")
+        assert response.status_code == 404
+
+        print("\n✓ Exercise Alternatives Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Exercise Alternatives Test FAILED: {str(e)}")
+        return False
+
+
+def test_data_stats():
+    """Test rolling stats endpoints"""
+    print("\n" + "="*50)
+    print("Testing Data Stats")
+    print("="*50)
+
+    try:
+        response = requests.get(f"{API_BASE_URL}/stats")
+        response.raise_for_status()
+        totals = response.json()
+        print(f"\nWorkout plans: {totals['workout_plans']}, calorie calculations: {totals['calorie_calculations']}")
+
+        response = requests.get(f"{API_BASE_URL}/stats/workouts")
+        response.raise_for_status()
+        workouts = response.json()
+        print(f"Goals: {workouts['counts']['goal']}")
+        assert workouts['total'] == totals['workout_plans']
+
+        response = requests.get(f"{API_BASE_URL}/stats/calories", params={"q": "0.5,0.9"})
+        response.raise_for_status()
+        calories = response.json()
+        print(f"Target calories: {calories['quantiles'].get('target_calories', {})}")
+        assert calories['total'] == totals['calorie_calculations']
+        assert all(set(m) >= {'p50', 'p90'} for m in calories['quantiles'].values())
+
+        response = requests.get(f"{API_BASE_URL}/stats/calories", params={"q": "1.5"})
+        assert response.status_code == 400
+
+        print("\n✓ Data Stats Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Data Stats Test FAILED: {str(e)}")
+        return False
+
+
+def test_result_cache():
+    """Test that a repeated calorie calculation is served from the result cache"""
+    print("\n" + "="*50)
+    print("Testing Result Cache")
+    print("="*50)
+
+    test_data = {
+        "age": 41,
+        "height": 168,
+        "weight": 63,
+        "gender": "female",
+        "activity_level": "light",
+        "goal": "maintain"
+    }
+
+    try:
+        response = requests.get(f"{API_BASE_URL}/cache/stats")
+        response.raise_for_status()
+        hits_before = response.json()['hits']
+
+        first = requests.post(f"{API_BASE_URL}/calculate-calories", json=test_data)
+        first.raise_for_status()
+        second = requests.post(f"{API_BASE_URL}/calculate-calories", json=test_data)
+        second.raise_for_status()
+        assert second.json() == first.json()
+
+        response = requests.get(f"{API_BASE_URL}/cache/stats")
+        response.raise_for_status()
+        stats = response.json()
+        print(f"\nHits: {hits_before} -> {stats['hits']}, hit ratio: {stats['hit_ratio']}")
+        assert stats['hits'] > hits_before
+
+        print("\n✓ Result Cache Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Result Cache Test FAILED: {str(e)}")
+        return False
+
+
+def test_duplicate_filtering():
+    """Test that retries and repeated submissions are saved once"""
+    print("\n" + "="*50)
+    print("Testing Duplicate Filtering")
+    print("="*50)
+
+    # A session length not sent recently, so the content check starts from an unseen body
+    test_data = {
+        "gender": "male",
+        "goal": "weight_loss",
+        "experience": "intermediate",
+        "equipment": ["dumbbell", "bench"],
+        "days_per_week": 3,
+        "session_duration": random.randint(20, 180)
+    }
+    headers = {"X-API-Key": TEST_API_KEYS["dedup"]}
+
+    def saved_plans():
+        response = requests.get(f"{API_BASE_URL}/stats")
+        response.raise_for_status()
+        return response.json()['workout_plans']
+
+    try:
+        # Client retry: same Idempotency-Key twice
+        before = saved_plans()
+        retry_headers = dict(headers, **{"Idempotency-Key": str(uuid.uuid4())})
+        for _ in range(2):
+            response = requests.post(f"{API_BASE_URL}/suggest-workout", json=test_data, headers=retry_headers)
+            response.raise_for_status()
+        saved = saved_plans() - before
+        print(f"\nSame Idempotency-Key twice: {saved} plan saved")
+        assert saved == 1
+
+        # Double submit: identical body twice from the same client, no key
+        before = saved_plans()
+        for _ in range(2):
+            response = requests.post(f"{API_BASE_URL}/suggest-workout", json=test_data, headers=headers)
+            response.raise_for_status()
+        saved = saved_plans() - before
+        print(f"Identical body twice: {saved} plan saved")
+        assert saved == 1
+
+        print("\n✓ Duplicate Filtering Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Duplicate Filtering Test FAILED: {str(e)}")
+        return False
+
+
+def test_admission_control():
+    """Test that an exhausted bucket gets 429 while the priority lane keeps answering"""
+    print("\n" + "="*50)
+    print("Testing Admission Control")
+    print("="*50)
+
+    test_data = {
+        "gender": "female",
+        "goal": "endurance",
+        "experience": "beginner",
+        "equipment": ["bodyweight"],
+        "days_per_week": 3
+    }
+    headers = {"X-API-Key": TEST_API_KEYS["admission"]}
+
+    try:
+        # suggest-workout costs 2 tokens of a 20-token burst, so the bucket runs dry within a dozen requests
+        response = None
+        for attempt in range(1, 16):
+            response = requests.post(f"{API_BASE_URL}/suggest-workout", json=test_data, headers=headers)
+            if response.status_code == 429:
+                break
+            response.raise_for_status()
+        print(f"\nRejected after {attempt} requests: {response.status_code}, "
+              f"Retry-After: {response.headers.get('Retry-After')}")
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+
+        response = requests.get(f"{API_BASE_URL}/exercises", headers=headers)
+        print(f"Exercise database for the same key: {response.status_code}")
+        assert response.status_code == 200
+
+        print("\n✓ Admission Control Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Admission Control Test FAILED: {str(e)}")
+        return False
+
+
+def test_frontend_serving():
+    """Test caching and compression of the built frontend served same-origin"""
+    print("\n" + "="*50)
+    print("Testing Frontend Serving")
+    print("="*50)
+
+    try:
+        response = requests.get(f"{SITE_URL}/")
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        print(f"\nShell: Cache-Control: {response.headers.get('Cache-Control')}, ETag: {etag}")
+        assert 'no-cache' in response.headers['Cache-Control']
+        assert etag
+
+        revalidated = requests.get(f"{SITE_URL}/", headers={"If-None-Match": etag})
+        print(f"Revalidation: {revalidated.status_code}")
+        assert revalidated.status_code == 304
+
+        assets = re.findall(r'/assets/[^"\'>\s]+', response.text)
+        assert assets, "no /assets/ references in the shell; run utils/build_assets.py and restart the server"
+
+        for asset in assets:
+            response = requests.get(f"{SITE_URL}{asset}", headers={"Accept-Encoding": "gzip"})
+            response.raise_for_status()
+            print(f"{asset}: Cache-Control: {response.headers.get('Cache-Control')}, "
+                  f"Content-Encoding: {response.headers.get('Content-Encoding')}")
+            assert 'immutable' in response.headers['Cache-Control']
+            assert response.headers.get('Content-Encoding') == 'gzip'
+            assert response.headers.get('Vary') == 'Accept-Encoding'
+
+        print("\n✓ Frontend Serving Test PASSED")
+        return True
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Error: Cannot connect to API. Is the server running?")
+        return False
+    except Exception as e:
+        print(f"\n✗ Frontend Serving Test FAILED: {str(e)}")
+        return False
+
+
 def main():
     print("\n" + "="*50)
     print("FitMentor API Test Suite")
     print("="*50)
     print("Ensure the backend server is running on http://localhost:5000")
+    print(f"with FITMENTOR_API_KEYS={','.join(TEST_API_KEYS.values())} after running utils/build_assets.py")
 
     results = {
         'Calorie Calculator': test_calorie_calculator(),
+        'Weight Projection': test_weight_projection(),
         'Workout Suggester': test_workout_suggester(),
-        'Exercise Database': test_exercise_database()
+        'Session Fitting': test_session_fitting(),
+        'Request Validation': test_request_validation(),
+        'Program Generator': test_program_generator(),
+        'Program Loads': test_program_loads(),
+        'Exercise Database': test_exercise_database(),
+        'Exercise Alternatives': test_exercise_alternatives(),
+        'Data Stats': test_data_stats(),
+        'Result Cache': test_result_cache(),
+        'Duplicate Filtering': test_duplicate_filtering(),
+        'Admission Control': test_admission_control(),
+        'Frontend Serving': test_frontend_serving()
     }
 
     print("\n" + "="*50)
@@ -0,0 +1,205 @@
+"""
+Request validation and normalization for FitMentor API
+Schemas are compiled once at import; each request runs a flat list of field checks
+
+validate() returns the normalized arguments plus a hashable key built from the
+same canonical values, so identical requests (in any field order, casing or
+equipment order) share one key for memoization.
+"""
+
+import math
+import re
+
+
+EQUIPMENT_TYPES = ('barbell', 'dumbbell', 'machine', 'cable', 'bench', 'rack', 'pullup_bar', 'bodyweight')
+EQUIPMENT_BITS = {name: 1 << i for i, name in enumerate(EQUIPMENT_TYPES)}
+
+INTEGER_STRING = re.compile(r'-?[0-9]+')
+
+
+class ValidationError(ValueError):
+    """Raised when a request fails validation; maps to a 400 response"""
+
+
+def encode_equipment(equipment):
+    """Encode an equipment list as a bitmask (order and duplicates ignored)"""
+    mask = 0
+    for item in equipment:
+        mask |= EQUIPMENT_BITS[item]
+    return mask
+
+
+def decode_equipment(mask):
+    """Decode an equipment bitmask into a list in canonical order"""
+    return [name for name in EQUIPMENT_TYPES if mask & EQUIPMENT_BITS[name]]
+
+
+def choice(*options):
+    """Case-insensitive enum field"""
+    lookup = {option.lower(): option for option in options}
+    expected = ', '.join(options)
+
+    def coerce(name, value):
+        if isinstance(value, str):
+            canonical = lookup.get(value.strip().lower())
+            if canonical is not None:
+                return canonical
+        raise ValidationError(f'Invalid value for {name}: expected one of {expected}')
+    return coerce
+
+
+def integer(minimum, maximum):
+    """Integer field; accepts integral floats and numeric strings"""
+    def coerce(name, value):
+        if isinstance(value, bool):
+            raise ValidationError(f'Invalid value for {name}: expected an integer')
+        if isinstance(value, str):
+            if not INTEGER_STRING.fullmatch(value.strip()):
+                raise ValidationError(f'Invalid value for {name}: expected an integer')
+            value = int(value)
+        elif isinstance(value, float):
+            if not value.is_integer():
+                raise ValidationError(f'Invalid value for {name}: expected an integer')
+            value = int(value)
+        elif not isinstance(value, int):
+            raise ValidationError(f'Invalid value for {name}: expected an integer')
+
+        if not minimum <= value <= maximum:
+            raise ValidationError(f'Invalid value for {name}: must be between {minimum} and {maximum}')
+        return value
+    return coerce
+
+
+def number(minimum, maximum, precision=1):
+    """Numeric field rounded to `precision` decimals so near-identical inputs share a key"""
+    def coerce(name, value):
+        if isinstance(value, bool):
+            raise ValidationError(f'Invalid value for {name}: expected a number')
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                raise ValidationError(f'Invalid value for {name}: expected a number')
+        elif not isinstance(value, (int, float)):
+            raise ValidationError(f'Invalid value for {name}: expected a number')
+
+        if not math.isfinite(value) or not minimum <= value <= maximum:
+            raise ValidationError(f'Invalid value for {name}: must be between {minimum} and {maximum}')
+        value = round(float(value), precision)
+        return int(value) if value.is_integer() else value
+    return coerce
+
+
+def equipment_mask():
+    """Equipment list (or comma-separated string) canonicalized to a bitmask"""
+    expected = ', '.join(EQUIPMENT_TYPES)
+
+    def coerce(name, value):
+        if isinstance(value, str):
+            value = [item for item in value.split(',') if item.strip()]
+        if not isinstance(value, (list, tuple)) or not value:
+            raise ValidationError(f'Invalid value for {name}: expected a non-empty list')
+
+        mask = 0
+        for item in value:
+            bit = EQUIPMENT_BITS.get(item.strip().lower()) if isinstance(item, str) else None
+            if bit is None:
+                raise ValidationError(f'Invalid value for {name}: expected items from {expected}')
+            mask |= bit
+        return mask
+    return coerce
+
+
+class Schema:
+    """Compiled request schema: ordered (name, coerce, required, default, decode) checks"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self._fields = tuple(
+            (field['name'], field['coerce'], field.get('required', True), field.get('default'),
+             field.get('decode'))
+            for field in fields
+        )
+
+    def validate(self, data):
+        """Return (normalized arguments, cache key) or raise ValidationError"""
+        if not isinstance(data, dict):
+            raise ValidationError('Request body must be a JSON object')
+
+        normalized = {}
+        key = [self.name]
+        for name, coerce, required, default, decode in self._fields:
+            value = data.get(name)
+            if value is None:
+                if required:
+                    raise ValidationError(f'Missing required field: {name}')
+                value = default
+            else:
+                value = coerce(name, value)
+
+            key.append(value)
+            normalized[name] = decode(value) if decode is not None and value is not None else value
+
+        return normalized, tuple(key)
+
+
+def profile_list(schema, max_items):
+    """Non-empty list of objects, each validated against `schema`"""
+    def coerce(name, value):
+        if not isinstance(value, list) or not 1 <= len(value) <= max_items:
+            raise ValidationError(f'Invalid value for {name}: expected a list of 1 to {max_items} items')
+
+        profiles = []
+        for i, item in enumerate(value):
+            try:
+                profiles.append(schema.validate(item)[0])
+            except ValidationError as e:
+                raise ValidationError(f'{name}[{i}]: {e}')
+        return tuple(tuple(profile.items()) for profile in profiles)
+    return coerce
+
+
+def _profile_dicts(profiles):
+    """Decode validated profile tuples back into keyword dicts"""
+    return [dict(profile) for profile in profiles]
+
+
+GENDERS = choice('male', 'female')
+
+CALORIE_SCHEMA = Schema('calories', [
+    {'name': 'age', 'coerce': integer(13, 100)},
+    {'name': 'height', 'coerce': number(100, 250)},
+    {'name': 'weight', 'coerce': number(30, 300)},
+    {'name': 'gender', 'coerce': GENDERS},
+    {'name': 'activity_level', 'coerce': choice('sedentary', 'light', 'moderate', 'active', 'very_active')},
+    {'name': 'goal', 'coerce': choice('lose', 'maintain', 'gain')}
+])
+
+_WORKOUT_FIELDS = [
+    {'name': 'gender', 'coerce': GENDERS},
+    {'name': 'goal', 'coerce': choice('strength', 'hypertrophy', 'endurance', 'weight_loss')},
+    {'name': 'experience', 'coerce': choice('beginner', 'intermediate', 'advanced')},
+    {'name': 'equipment', 'coerce': equipment_mask(), 'decode': decode_equipment},
+    {'name': 'days_per_week', 'coerce': integer(3, 6)},
+    {'name': 'session_duration', 'coerce': integer(20, 180), 'required': False, 'default': 60}
+]
+
+WORKOUT_SCHEMA = Schema('workout', _WORKOUT_FIELDS)
+
+PROGRAM_SCHEMA = Schema('program', _WORKOUT_FIELDS + [
+    {'name': 'weeks', 'coerce': integer(12, 52)},
+    {'name': 'start_week', 'coerce': integer(1, 52), 'required': False, 'default': 1},
+    {'name': 'end_week', 'coerce': integer(1, 52), 'required': False}
+])
+
+ALTERNATIVES_SCHEMA = Schema('alternatives', [
+    {'name': 'equipment', 'coerce': equipment_mask(), 'required': False},
+    {'name': 'experience', 'coerce': choice('beginner', 'intermediate', 'advanced'), 'required': False},
+    {'name': 'k', 'coerce': integer(1, 50), 'required': False, 'default': 5}
+])
+
+PROJECTION_SCHEMA = Schema('projection', [
+    {'name': 'profiles', 'coerce': profile_list(CALORIE_SCHEMA, 10000), 'decode': _profile_dicts},
+    {'name': 'weeks', 'coerce': integer(1, 104), 'required': False, 'default': 12},
+    {'name': 'adjust_every_weeks', 'coerce': integer(1, 12), 'required': False, 'default': 2}
+])
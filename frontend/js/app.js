@@ -1,5 +1,5 @@
-// API Configuration
-const API_BASE_URL = 'http://localhost:5000/api';
+// API Configuration (served same-origin by the backend)
+const API_BASE_URL = '/api';
 
 // Current unit system
 let currentUnit = 'metric';
@@ -1,5 +1,5 @@
 #!/bin/bash
-cd "$(dirname "$0")/frontend"
-echo "Starting FitMentor Frontend Server..."
-echo "Visit http://localhost:8000 in your browser"
-python3 -m http.server 8000
+cd "$(dirname "$0")"
+echo "Building FitMentor Frontend..."
+python3 backend/utils/build_assets.py
+echo "The backend serves the frontend: start it with ./start_backend.sh and visit http://localhost:5000"